@@ -3,9 +3,16 @@ Multi-Page Geopolitical Analysis Dashboard
 Built with Plotly Dash and Bootstrap Components
 """
 
+import os
+
 import dash
 from dash import html
 import dash_bootstrap_components as dbc
+from flask import jsonify, request
+
+import chart_data
+import figure_cache
+from flags import FLAG_ASSET_EXTENSIONS
 
 # Create the Dash app with multi-page support
 app = dash.Dash(
@@ -69,6 +76,46 @@ app.layout = html.Div([
 # Get the server for deployment
 server = app.server
 
+
+def init():
+    """Start this process's background threads.
+
+    Runs once per serving process, never on import: gunicorn calls it in
+    each worker (see gunicorn.conf.py), after the fork, and the __main__
+    block calls it for the development server.
+    """
+    # Pick up edits to CHART_DATA_PATH without a restart (one watcher per worker)
+    chart_data.start_data_watcher()
+
+    # Build every page's figures in the background while requests are served
+    figure_cache.start_warmup()
+
+
+# 503 until the warm-up has finished, so load balancers can hold traffic
+# back until first clicks are cache hits
+@server.route("/ready")
+def ready():
+    status = figure_cache.warmup_status()
+    return jsonify(status._asdict()), 200 if status.ready else 503
+
+
+# Prebuilt flags (see build_flag_assets.py) have content-hashed filenames,
+# so browsers may cache them indefinitely (not manifest.json)
+FLAG_ASSET_SUFFIXES = tuple({"." + ext for ext in FLAG_ASSET_EXTENSIONS.values()})
+
+
+@server.after_request
+def cache_flag_assets(response):
+    if request.path.startswith(app.get_asset_url("flags/")) and request.path.endswith(FLAG_ASSET_SUFFIXES):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    return response
+
 # Run the Dash app
 if __name__ == '__main__':
+    # The debug reloader serves from a child process it re-runs this file in
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        init()
     app.run(debug=True, port=8050)
@@ -0,0 +1,93 @@
+"""
+Benchmark chart_data filtering as the dataset grows
+
+The 5-row dataset is tiled up to a few hundred thousand rows, with spend
+and influence values jittered so range filters select partial slices. For
+each size the FilterIndex is built once, then combined predicates are
+timed against the equivalent boolean-mask pandas filter.
+
+Usage:
+    python benchmarks/bench_filter.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from chart_data import FilterIndex, get_data
+
+SIZES = [5, 1_000, 10_000, 100_000, 500_000]
+REPEATS = 50
+
+QUERY = dict(
+    countries=["Kazakhstan", "Azerbaijan", "Georgia"],
+    suppliers=["Turkey", "US"],
+    spend_range=(40e6, 110e6),
+    min_influence={"Russia": 2.0},
+)
+
+
+def make_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Tile the dataset to ``n_rows`` rows with jittered numeric columns."""
+    base = get_data()
+    df = base.iloc[np.arange(n_rows) % len(base)].reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    df["Avg_Spend"] = df["Avg_Spend"] * rng.uniform(0.5, 1.5, n_rows)
+    df["Influence_Russia_numeric"] = np.clip(
+        df["Influence_Russia_numeric"] + rng.normal(0, 0.5, n_rows), 0, 3)
+    return df
+
+
+def pandas_filter(df: pd.DataFrame) -> np.ndarray:
+    """The same query as boolean masks over the raw columns."""
+    suppliers = df["Suppliers"].str.split(",").apply(lambda xs: {x.strip() for x in xs})
+    mask = (
+        df["Country"].isin(QUERY["countries"])
+        & suppliers.apply(lambda s: bool(s & set(QUERY["suppliers"])))
+        & df["Avg_Spend"].between(*QUERY["spend_range"])
+        & (df["Influence_Russia_numeric"] >= QUERY["min_influence"]["Russia"])
+    )
+    return np.flatnonzero(mask.to_numpy())
+
+
+def timed(fn, repeats: int) -> float:
+    """Median wall time of ``fn`` in milliseconds."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1e3)
+    return float(np.median(times))
+
+
+def main():
+    print("=" * 78)
+    print("FILTER BENCHMARK")
+    print("=" * 78)
+    print(f"{'rows':>8} | {'index build':>11} | {'indexed':>9} | {'pandas':>9} | {'matches':>8}")
+    print("-" * 78)
+    for n_rows in SIZES:
+        df = make_frame(n_rows)
+
+        start = time.perf_counter()
+        index = FilterIndex(df)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        positions = index.select(**QUERY)
+        assert np.array_equal(positions, pandas_filter(df)), "index and pandas disagree"
+
+        indexed_ms = timed(lambda: index.select(**QUERY), REPEATS)
+        pandas_ms = timed(lambda: pandas_filter(df), max(1, REPEATS // 10))
+        print(f"{n_rows:8d} | {build_ms:9.1f}ms | {indexed_ms:7.3f}ms | {pandas_ms:7.2f}ms | "
+              f"{len(positions):8d}")
+    print("=" * 78)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
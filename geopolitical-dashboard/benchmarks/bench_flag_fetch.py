@@ -0,0 +1,150 @@
+"""
+Benchmark flag fetching against a local stub flag CDN
+
+Serves generated flag images from a local http.server, with routes that
+answer at once, answer after SLOW_SECONDS, or fail with 503, and drives
+flags.get_circular_flags through three scenarios:
+
+- concurrency: flags that each take SLOW_SECONDS arrive in about one
+  SLOW_SECONDS overall, not one after another;
+- deadline: flags slower than the deadline come back as placeholders once
+  the deadline passes;
+- circuit breaker: a failing CDN opens FLAG_CDN_BREAKER once, after which
+  misses become placeholders without any request, even though the calls
+  already in flight keep failing; after the backoff a single trial request
+  closes it again.
+
+Nothing reaches the real CDN, and the flag cache is kept in memory only.
+
+Usage:
+    python benchmarks/bench_flag_fetch.py
+"""
+
+import http.server
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+import flags
+
+N_FLAGS = 8
+SLOW_SECONDS = 1.0
+DEADLINE = 0.3
+
+
+class StubCDN(http.server.ThreadingHTTPServer):
+    """Flag CDN stand-in: /ok/..., /slow/... and /fail/... paths."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 48), (0, 114, 188)).save(buffer, format="PNG")
+        self.flag = buffer.getvalue()
+        self.requests = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def urls(self, route: str, tag: str) -> dict:
+        port = self.server_address[1]
+        return {f"{route}-{i}": f"http://127.0.0.1:{port}/{route}/{tag}-{i}.png" for i in range(N_FLAGS)}
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+        if self.path.startswith("/fail/"):
+            self.send_error(503)
+            return
+        if self.path.startswith("/slow/"):
+            time.sleep(SLOW_SECONDS)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(self.server.flag)))
+        self.end_headers()
+        self.wfile.write(self.server.flag)
+
+    def log_message(self, *args):
+        pass
+
+
+class CountingBreaker(flags.CircuitBreaker):
+    """CircuitBreaker on a settable clock that counts how often it opens."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.opened = 0
+        super().__init__(clock=lambda: self.now)
+
+    def _open(self):
+        self.opened += 1
+        super()._open()
+
+
+def fetch(cdn: StubCDN, flag_urls: dict, deadline: float):
+    """(seconds, real flags, placeholders, requests made) for one call."""
+    before = cdn.requests
+    start = time.perf_counter()
+    results = flags.get_circular_flags(flag_urls, size=64, deadline=deadline)
+    seconds = time.perf_counter() - start
+    placeholders = sum(flags.is_placeholder_flag(url) for url in results.values())
+    return seconds, len(results) - placeholders, placeholders, cdn.requests - before
+
+
+def main():
+    cdn = StubCDN()
+    flags._flag_cache = flags.FlagCache(directory="")
+    breaker = flags.FLAG_CDN_BREAKER = CountingBreaker()
+
+    rows = [
+        ("fast", fetch(cdn, cdn.urls("ok", "a"), deadline=5.0)),
+        (f"slow ({SLOW_SECONDS:g}s each)", fetch(cdn, cdn.urls("slow", "a"), deadline=5.0)),
+        (f"slow, {DEADLINE:g}s deadline", fetch(cdn, cdn.urls("slow", "b"), deadline=DEADLINE)),
+    ]
+    time.sleep(SLOW_SECONDS)  # Let the abandoned fetches free the pool
+    rows += [
+        ("failing", fetch(cdn, cdn.urls("fail", "a"), deadline=5.0)),
+        ("failing, breaker open", fetch(cdn, cdn.urls("fail", "b"), deadline=5.0)),
+    ]
+    opened = breaker.opened
+    breaker.now += breaker.backoff  # Backoff over: the next miss is the trial
+    rows += [
+        ("backoff over: one trial", fetch(cdn, cdn.urls("ok", "b"), deadline=5.0)),
+        ("breaker closed again", fetch(cdn, cdn.urls("ok", "b"), deadline=5.0)),
+    ]
+
+    print("=" * 72)
+    print(f"FLAG FETCH AGAINST A STUB CDN ({N_FLAGS} flags per call)")
+    print("=" * 72)
+    print(f"{'scenario':28} | {'wall':>7} | {'flags':>5} | {'placeholders':>12} | {'requests':>8}")
+    print("-" * 72)
+    for name, (seconds, real, placeholders, requests) in rows:
+        print(f"{name:28} | {seconds:6.2f}s | {real:5} | {placeholders:12} | {requests:8}")
+    print("-" * 72)
+    print(f"breaker opened {opened} time(s), state after recovery: {breaker.state}")
+    print("=" * 72)
+
+    results = dict(rows)
+    assert results[f"slow ({SLOW_SECONDS:g}s each)"][0] < 2 * SLOW_SECONDS, "slow flags were not fetched concurrently"
+    assert results[f"slow, {DEADLINE:g}s deadline"][0] < SLOW_SECONDS, "deadline was not enforced"
+    assert results[f"slow, {DEADLINE:g}s deadline"][2] == N_FLAGS, "late flags were not placeholders"
+    assert results["failing, breaker open"][3] == 0, "open breaker still made requests"
+    assert opened == 1, "breaker re-opened on in-flight failures"
+    assert breaker.state == "closed", "successful trial did not close the breaker"
+    assert results["breaker closed again"][1] == N_FLAGS, "flags still refused after recovery"
+    flags._executor.shutdown(wait=True)
+    cdn.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark cold-start import time of the dashboard modules
+
+Each module is imported in a fresh interpreter, the way a gunicorn worker
+starts, while counting the HTTP requests made during the import. The old
+import-time behaviour of geopolitical_app (building the threat map, which
+downloads every flag) is timed alongside for comparison.
+
+Importing the app starts no threads. The app is also timed through init(),
+which gunicorn calls in each worker, until the figure warm-up reports ready
+(what a worker does before its first click is a cache hit); the warm-up
+takes flags from the prebuilt assets or as placeholders, so it makes no
+requests either.
+
+Usage:
+    python benchmarks/bench_import.py
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEATS = 5
+
+# Runs in the child interpreter: counts outgoing requests, times the import
+# (plus an optional statement) and prints "<seconds> <requests>"
+PROBE = """
+import sys, time
+import requests
+calls = [0]
+_request = requests.Session.request
+def counted(self, *args, **kwargs):
+    calls[0] += 1
+    return _request(self, *args, **kwargs)
+requests.Session.request = counted
+start = time.perf_counter()
+import {module}
+{extra}
+print(f"RESULT {{time.perf_counter() - start:.4f}} {{calls[0]}}")
+"""
+
+WAIT_FOR_WARMUP = """
+import figure_cache
+Transcaspian_Defense_Data_app.init()
+while not figure_cache.warmup_status().ready:
+    time.sleep(0.01)
+"""
+
+# (label, module, extra statement, environment overrides)
+CASES = [
+    ("geopolitical_app", "geopolitical_app", "", {}),
+    ("geopolitical_app + figure (old import)", "geopolitical_app",
+     "geopolitical_app.create_threat_density_map()", {}),
+    ("Transcaspian_Defense_Data_app", "Transcaspian_Defense_Data_app", "", {}),
+    ("Transcaspian_Defense_Data_app, init() until warm", "Transcaspian_Defense_Data_app",
+     WAIT_FOR_WARMUP, {}),
+]
+
+
+def run_case(module: str, extra: str, overrides: dict):
+    """Import ``module`` in a fresh interpreter; returns (seconds, requests)."""
+    env = dict(os.environ, FLAG_CACHE_DIR="", **overrides)  # Cold cache, like a new dyno
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, extra=extra)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    line = [l for l in out.splitlines() if l.startswith("RESULT ")][-1]
+    seconds, calls = line.split()[1:]
+    return float(seconds), int(calls)
+
+
+def main():
+    print("=" * 80)
+    print("COLD IMPORT BENCHMARK")
+    print("=" * 80)
+    print(f"{'case':50} | {'median':>8} | {'max':>8} | {'HTTP':>4}")
+    print("-" * 80)
+    for label, module, extra, overrides in CASES:
+        results = [run_case(module, extra, overrides) for _ in range(REPEATS)]
+        times = sorted(r[0] for r in results)
+        calls = max(r[1] for r in results)
+        print(f"{label:50} | {times[len(times) // 2]:7.3f}s | {times[-1]:7.3f}s | {calls:4d}")
+    print("=" * 80)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
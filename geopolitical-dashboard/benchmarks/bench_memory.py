@@ -0,0 +1,102 @@
+"""
+Report the dataset's memory footprint before and after compact dtypes
+
+Builds a synthetic 100k-row version of the dataset (200 countries, random
+supplier and priority lists, jittered numbers) as plain object/int64/
+float64 columns, then re-encodes it with chart_data.compact_dtypes and
+prints the deep memory usage per column group, plus the code lists built
+for the comma-separated columns.
+
+Usage:
+    python benchmarks/bench_memory.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from chart_data import MULTI_VALUE_COLUMNS, CodeList, _build_data, compact_dtypes
+
+N_ROWS = 100_000
+N_COUNTRIES = 200
+
+SUPPLIERS = ["Russia", "China", "US", "Turkey", "Israel", "NATO"]
+PRIORITIES = ["Border Security", "Regional Stability", "Terrorism Prevention",
+              "Energy Infrastructure Protection", "Territorial Integrity", "Energy Security",
+              "NATO Integration", "Russian Deterrence"]
+
+
+def _random_lists(rng, vocabulary, n_rows, max_entries=3) -> list:
+    """``n_rows`` comma-separated lists of 1..max_entries distinct entries."""
+    picks = rng.permuted(np.tile(np.arange(len(vocabulary)), (n_rows, 1)), axis=1)
+    lengths = rng.integers(1, max_entries + 1, n_rows)
+    return [", ".join(vocabulary[i] for i in row[:k]) for row, k in zip(picks, lengths)]
+
+
+def make_frame(n_rows: int = N_ROWS, seed: int = 0) -> pd.DataFrame:
+    """Synthetic dataset with the real columns and plain (uncompressed) dtypes."""
+    rng = np.random.default_rng(seed)
+    base = _build_data()
+    df = base.iloc[np.arange(n_rows) % len(base)].reset_index(drop=True)
+    df["Country"] = [f"{c} {i // len(base) % (N_COUNTRIES // len(base))}" for i, c in enumerate(df["Country"])]
+    df["Suppliers"] = _random_lists(rng, SUPPLIERS, n_rows)
+    df["Defense Priorities"] = _random_lists(rng, PRIORITIES, n_rows)
+    df["Avg_Spend"] = (df["Avg_Spend"] * rng.uniform(0.5, 1.5, n_rows)).astype(np.int64)
+    for column in df.columns:
+        if column.endswith("_numeric"):
+            df[column] = rng.integers(0, 7, n_rows) / 2  # 0-3 in half steps
+    return df.astype({c: object for c in df.columns if df[c].dtype.kind in "OUT"})
+
+
+def _group(column: str) -> str:
+    if column.endswith("_numeric"):
+        return "influence/matrix scores"
+    if column.startswith("Systems_"):
+        return "Systems_* lists"
+    if column in MULTI_VALUE_COLUMNS:
+        return "supplier/priority lists"
+    if column in ("Country", "Threat Perception"):
+        return "country/threat labels"
+    return "spend/distance"
+
+
+def _usage(df: pd.DataFrame) -> dict:
+    usage = df.memory_usage(deep=True, index=False)
+    groups = {}
+    for column, nbytes in usage.items():
+        groups[_group(column)] = groups.get(_group(column), 0) + int(nbytes)
+    return groups
+
+
+def main():
+    raw = make_frame()
+    compact = compact_dtypes(raw)
+    code_lists = {c: CodeList(compact[c]) for c in MULTI_VALUE_COLUMNS}
+
+    before, after = _usage(raw), _usage(compact)
+    print("=" * 70)
+    print(f"DATASET MEMORY FOOTPRINT ({len(raw):,} rows, {raw['Country'].nunique()} countries)")
+    print("=" * 70)
+    print(f"{'columns':28} | {'before':>10} | {'after':>10} | {'ratio':>6}")
+    print("-" * 70)
+    for group in before:
+        print(f"{group:28} | {before[group] / 2**20:8.2f}MB | {after[group] / 2**20:8.2f}MB | "
+              f"{before[group] / max(after[group], 1):5.1f}x")
+    total_before, total_after = sum(before.values()), sum(after.values())
+    print("-" * 70)
+    print(f"{'total':28} | {total_before / 2**20:8.2f}MB | {total_after / 2**20:8.2f}MB | "
+          f"{total_before / total_after:5.1f}x")
+    print()
+    for column, code_list in code_lists.items():
+        print(f"Code list {column!r}: {len(code_list.vocabulary)} entries, "
+              f"{code_list.nbytes / 2**20:.2f}MB")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
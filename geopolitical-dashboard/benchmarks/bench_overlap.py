@@ -0,0 +1,120 @@
+"""
+Benchmark the flag overlap resolver against the original O(n^2) loop
+
+Both resolvers run on the same random layouts, in the same screen-space
+units, so the comparison is like for like. The original loop is only timed
+up to a few hundred markers; beyond that it takes minutes.
+
+Usage:
+    python benchmarks/bench_overlap.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from geopolitical_app import (
+    PLOT_AREA_HEIGHT_PX,
+    PLOT_AREA_WIDTH_PX,
+    _detect_and_resolve_overlaps,
+)
+
+SIZES = [5, 50, 200, 500, 1000, 5000, 20000]
+LEGACY_MAX_SIZE = 500
+
+# Markers never get closer than 20px, but at large counts the spacing is
+# reduced so they cover ~30% of the plot area and a solution exists
+MAX_MIN_DISTANCE_PX = 20.0
+TARGET_COVERAGE = 0.3
+
+
+def legacy_resolve_overlaps(summary: pd.DataFrame, min_distance: float = 3.0) -> pd.DataFrame:
+    """The original pure-Python pairwise resolver, kept for comparison."""
+    summary = summary.copy()
+    positions = summary[["Distance", "Avg_Spend"]].to_numpy(dtype=float, copy=True)
+
+    max_iterations = 100
+    for _ in range(max_iterations):
+        adjusted = False
+
+        for i in range(len(positions)):
+            for j in range(i + 1, len(positions)):
+                dx = positions[i, 0] - positions[j, 0]
+                dy = positions[i, 1] - positions[j, 1]
+                dist = np.sqrt(dx**2 + dy**2)
+
+                if dist < min_distance and dist > 0:
+                    adjusted = True
+                    push_x = (dx / dist) * (min_distance - dist) / 2
+                    push_y = (dy / dist) * (min_distance - dist) / 2
+
+                    positions[i, 0] += push_x
+                    positions[j, 0] -= push_x
+                    positions[i, 1] += push_y
+                    positions[j, 1] -= push_y
+
+        if not adjusted:
+            break
+
+    summary["Distance"] = positions[:, 0]
+    summary["Avg_Spend"] = positions[:, 1]
+    return summary
+
+
+def make_layout(n: int, seed: int = 0) -> pd.DataFrame:
+    """Random markers already in plot pixels, so both resolvers share units."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Country": [f"C{i}" for i in range(n)],
+        "Distance": np.r_[0.0, PLOT_AREA_WIDTH_PX, rng.uniform(0, PLOT_AREA_WIDTH_PX, n - 2)],
+        "Avg_Spend": np.r_[0.0, PLOT_AREA_HEIGHT_PX, rng.uniform(0, PLOT_AREA_HEIGHT_PX, n - 2)],
+    })
+
+
+def min_pair_distance(df: pd.DataFrame) -> float:
+    from scipy.spatial import cKDTree
+    dist, _ = cKDTree(df[["Distance", "Avg_Spend"]].to_numpy()).query(df[["Distance", "Avg_Spend"]].to_numpy(), k=2)
+    return float(dist[:, 1].min())
+
+
+def min_distance_for(n: int) -> float:
+    area = PLOT_AREA_WIDTH_PX * PLOT_AREA_HEIGHT_PX
+    return min(MAX_MIN_DISTANCE_PX, float(np.sqrt(TARGET_COVERAGE * area * 4 / (np.pi * n))))
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    print("=" * 70)
+    print("OVERLAP RESOLVER BENCHMARK")
+    print("=" * 70)
+    print(f"{'markers':>8} | {'min gap':>8} | {'legacy':>10} | {'kd-tree':>10} | {'speedup':>8} | {'gap after':>9}")
+
+    for n in SIZES:
+        layout = make_layout(n)
+        min_distance = min_distance_for(n)
+        resolved, new_time = timed(_detect_and_resolve_overlaps, layout, min_distance=min_distance)
+        if n <= LEGACY_MAX_SIZE:
+            _, legacy_time = timed(legacy_resolve_overlaps, layout, min_distance=min_distance)
+            legacy_col = f"{legacy_time * 1e3:8.1f}ms"
+            speedup_col = f"{legacy_time / new_time:7.0f}x"
+        else:
+            legacy_col = f"{'skipped':>10}"
+            speedup_col = f"{'-':>8}"
+        print(f"{n:>8} | {min_distance:6.1f}px | {legacy_col} | {new_time * 1e3:8.1f}ms | {speedup_col} | "
+              f"{min_pair_distance(resolved):7.1f}px")
+
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark the shared figure cache across worker processes
+
+Starts N processes that all miss the same figure at the same moment, once
+per backend: no shared store (every process builds it), a directory
+(figure_cache.FileFigureStore) and Redis (RedisFigureStore against the
+local stand-in in fake_redis.py; needs redis-py). The builder sleeps
+BUILD_SECONDS to stand in for an expensive figure, so single-flight shows
+up as one build and roughly one build's wall time however many processes
+ask.
+
+Usage:
+    python benchmarks/bench_shared_cache.py
+"""
+
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORKER_COUNTS = [1, 4, 8]
+BUILD_SECONDS = 0.5
+
+
+def _worker(url, barrier, results):
+    os.environ["FIGURE_CACHE_URL"] = url
+    import plotly.graph_objects as go
+    import chart_data
+    from figure_cache import memoize_figure
+
+    built = []
+
+    @memoize_figure(columns=["Country", "Avg_Spend"])
+    def create_spend_figure(title="Spending"):
+        built.append(True)
+        time.sleep(BUILD_SECONDS)
+        df = chart_data.get_data(["Country", "Avg_Spend"])
+        return go.Figure(go.Bar(x=df["Country"], y=df["Avg_Spend"]), layout={"title": title})
+
+    chart_data.data_version()  # Load outside the timed part
+    barrier.wait()
+    start = time.perf_counter()
+    create_spend_figure.cached()
+    results.put((len(built), time.perf_counter() - start))
+
+
+def run(url: str, n_workers: int):
+    """(total builds, slowest worker's seconds) for ``n_workers`` workers."""
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(url, barrier, results)) for _ in range(n_workers)]
+    for w in workers:
+        w.start()
+    outcomes = [results.get() for _ in workers]
+    for w in workers:
+        w.join()
+    return sum(b for b, _ in outcomes), max(t for _, t in outcomes)
+
+
+def main():
+    from fake_redis import FakeRedisServer
+    import figure_cache
+
+    backends = [("none", lambda: "")]
+    backends.append(("directory", lambda: tempfile.mkdtemp()))
+    if figure_cache.redis is not None:
+        server = FakeRedisServer().start()
+        backends.append(("redis (fake)", lambda: server.url))
+
+    print("=" * 60)
+    print(f"SHARED FIGURE CACHE (builder takes {BUILD_SECONDS}s)")
+    print("=" * 60)
+    print(f"{'backend':14} | {'workers':>7} | {'builds':>6} | {'wall':>7}")
+    print("-" * 60)
+    for name, make_url in backends:
+        for n in WORKER_COUNTS:
+            # A fresh store per run, so every run starts cold
+            builds, seconds = run(make_url(), n)
+            if name == "redis (fake)":
+                server.data.clear()
+            print(f"{name:14} | {n:7d} | {builds:6d} | {seconds:6.2f}s")
+    if figure_cache.redis is None:
+        print("(redis-py not installed: Redis backend skipped)")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
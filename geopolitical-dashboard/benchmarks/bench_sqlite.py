@@ -0,0 +1,89 @@
+"""
+Benchmark SQLite pushdown against loading the table into memory
+
+Writes the synthetic dataset from bench_memory.py to a SQLite database with
+chart_data.build_sqlite_database, then times a selective filtered query and
+a per-country aggregation two ways: pushed down as SQL (query_data /
+country_means on a SQLite source) and by reading the needed columns of
+every row and filtering/grouping in pandas.
+
+Usage:
+    python benchmarks/bench_sqlite.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import chart_data
+from bench_memory import make_frame
+
+N_ROWS = 200_000
+REPEATS = 5
+
+COLUMNS = ["Country", "Avg_Spend", "Threat Perception"]
+QUERY = dict(
+    countries=["Kazakhstan 3", "Georgia 7"],
+    suppliers=["Turkey"],
+    min_influence={"Russia": 2.0},
+)
+MEAN_COLUMNS = ["Avg_Spend", "Influence_US_numeric", "Influence_Russia_numeric"]
+
+
+def timed(fn) -> float:
+    """Median wall time of ``fn`` in milliseconds."""
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1e3)
+    return float(np.median(times))
+
+
+def in_memory_query():
+    df = chart_data._read_sqlite(chart_data.CHART_DATA_PATH, None)
+    return chart_data.FilterIndex(df).select(**QUERY)
+
+
+def in_memory_means():
+    df = chart_data._read_sqlite(chart_data.CHART_DATA_PATH, ["Country"] + MEAN_COLUMNS)
+    return df.groupby("Country", sort=False)[MEAN_COLUMNS].mean()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dataset.sqlite")
+        start = time.perf_counter()
+        chart_data.build_sqlite_database(make_frame(N_ROWS), path)
+        build_s = time.perf_counter() - start
+        chart_data.CHART_DATA_PATH = path
+        chart_data.reset_dataset()
+
+        rows = len(chart_data.query_data(COLUMNS, **QUERY))
+        assert rows == len(in_memory_query()), "pushdown and in-memory disagree"
+
+        print("=" * 70)
+        print(f"SQLITE PUSHDOWN ({N_ROWS:,} rows, {os.path.getsize(path) / 2**20:.0f}MB, "
+              f"built in {build_s:.1f}s)")
+        print("=" * 70)
+        print(f"{'operation':32} | {'pushdown':>10} | {'load + pandas':>13}")
+        print("-" * 70)
+        print(f"{f'filtered query ({rows} rows)':32} | "
+              f"{timed(lambda: chart_data.query_data(COLUMNS, **QUERY)):8.1f}ms | "
+              f"{timed(in_memory_query):11.1f}ms")
+        print(f"{'means by country':32} | "
+              f"{timed(lambda: chart_data.country_means(MEAN_COLUMNS)):8.1f}ms | "
+              f"{timed(in_memory_means):11.1f}ms")
+        print("=" * 70)
+        chart_data.close_sqlite_connections()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Benchmark dataset memory across server workers, private vs shared
+
+Writes the synthetic 100k-row dataset from bench_memory.py to Parquet, then
+starts N worker processes that either load it and build the derived indexes
+themselves (what every gunicorn worker did before) or attach the file
+written by chart_data.export_shared_dataset. Each worker pages in every
+array, and the summed proportional set size (PSS, shared pages split between
+the processes mapping them) is reported. Linux only.
+
+Usage:
+    python benchmarks/bench_workers.py
+"""
+
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKER_COUNTS = [1, 2, 4, 8]
+
+
+def _pss_mb() -> float:
+    """Proportional set size of this process, in MB."""
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _worker(mode, data_path, shared_path, barrier, results):
+    os.environ["CHART_DATA_PATH"] = data_path
+    if mode == "shared":
+        os.environ["CHART_DATA_SHARED"] = shared_path
+    import numpy as np
+    import chart_data
+
+    baseline = _pss_mb()
+    df = chart_data.get_data()
+    structures = [chart_data.get_filter_index(), chart_data.get_influence_tensor(),
+                  chart_data.get_systems_catalog(), chart_data.get_code_lists()]
+    # Touch every byte, as serving traffic eventually would
+    for column in df.columns:
+        values = df[column].cat.codes if df[column].dtype == "category" else df[column]
+        np.asarray(values).sum()
+    for bitmaps in structures[0]._bitmaps.values():
+        sum(int(b.sum()) for b in bitmaps.values())
+    for sorted_values, rank, _ in structures[0]._sorted.values():
+        rank.sum()
+
+    barrier.wait()
+    results.put(_pss_mb() - baseline)
+    barrier.wait()
+
+
+def run(mode: str, n_workers: int, data_path: str, shared_path: str) -> float:
+    """Summed dataset PSS of ``n_workers`` workers, in MB."""
+    ctx = mp.get_context("spawn")  # No pages inherited from this process
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(mode, data_path, shared_path, barrier, results))
+               for _ in range(n_workers)]
+    for w in workers:
+        w.start()
+    total = sum(results.get() for _ in workers)
+    for w in workers:
+        w.join()
+    return total
+
+
+def main():
+    from bench_memory import make_frame
+    import chart_data
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, "dataset.parquet")
+        make_frame().to_parquet(data_path)
+        chart_data.CHART_DATA_PATH = data_path
+        shared_path = chart_data.export_shared_dataset(tmp)
+
+        print("=" * 60)
+        print("DATASET MEMORY ACROSS WORKERS (summed PSS)")
+        print("=" * 60)
+        print(f"{'workers':>8} | {'private':>10} | {'shared':>10}")
+        print("-" * 60)
+        for n in WORKER_COUNTS:
+            private = run("private", n, data_path, shared_path)
+            shared = run("shared", n, data_path, shared_path)
+            print(f"{n:8d} | {private:8.1f}MB | {shared:8.1f}MB")
+        print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Local stand-in for a Redis server, for exercising the shared figure cache
+
+Speaks enough of the Redis protocol for figure_cache.RedisFigureStore
+through redis-py: PING, GET, SET with EX/PX/NX/XX, DEL, EXISTS, SELECT,
+the HELLO/CLIENT handshake (RESP2 or RESP3), and EVAL, EVALSHA and SCRIPT
+LOAD for the lock-release script only (there is no Lua interpreter). Keys
+live in one in-memory dict; expiries are checked when a key is read. Not
+for production use.
+
+Usage:
+    python benchmarks/fake_redis.py [port]
+    FIGURE_CACHE_URL=redis://127.0.0.1:6379/0 gunicorn Transcaspian_Defense_Data_app:server
+"""
+
+import hashlib
+import socketserver
+import sys
+import threading
+import time
+
+DEFAULT_PORT = 6379
+
+# figure_cache._REDIS_UNLOCK_SCRIPT, the one script this server can run
+UNLOCK_SCRIPT = 'if redis.call("get",KEYS[1])==ARGV[1] then return redis.call("del",KEYS[1]) end'
+
+
+class CommandError(Exception):
+    """Error reply; ``code`` is its prefix (ERR, NOSCRIPT, ...)."""
+
+    def __init__(self, message: str, code: str = "ERR"):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded TCP server holding the key space shared by its connections."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=("127.0.0.1", 0)):
+        super().__init__(address, _Handler)
+        self.data = {}  # key -> (value, expiry as time.monotonic() or None)
+        self.scripts = {}  # SHA1 hex digest -> script source
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        """Serve from a daemon thread; returns self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            entry = None
+        return entry
+
+    def _eval(self, script: bytes, args: list):
+        """Run a script under the server lock, so it is atomic like in Redis."""
+        if " ".join(script.decode().split()) != UNLOCK_SCRIPT:
+            return CommandError("only the lock-release script is supported")
+        numkeys = int(args[0])
+        keys, argv = args[1:1 + numkeys], args[1 + numkeys:]
+        entry = self._live(keys[0])
+        if entry is not None and entry[0] == argv[0]:
+            del self.data[keys[0]]
+            return 1
+        return None
+
+    def execute(self, command: str, args: list):
+        """Run one command; returns the reply value (Exception for errors)."""
+        with self.lock:
+            if command == "SCRIPT" and args[0].decode().upper() == "LOAD":
+                sha = hashlib.sha1(args[1]).hexdigest()
+                self.scripts[sha] = args[1]
+                return sha.encode()
+            if command == "EVAL":
+                return self._eval(args[0], args[1:])
+            if command == "EVALSHA":
+                script = self.scripts.get(args[0].decode().lower())
+                if script is None:
+                    return CommandError("No matching script. Please use EVAL.", code="NOSCRIPT")
+                return self._eval(script, args[1:])
+            if command == "PING":
+                return "PONG"
+            if command in ("CLIENT", "SELECT"):
+                return "OK"
+            if command == "GET":
+                entry = self._live(args[0])
+                return None if entry is None else entry[0]
+            if command == "SET":
+                key, value, options = args[0], args[1], [a.decode().upper() for a in args[2:]]
+                expiry, i = None, 0
+                while i < len(options):
+                    if options[i] in ("EX", "PX"):
+                        seconds = float(options[i + 1]) / (1 if options[i] == "EX" else 1000)
+                        expiry = time.monotonic() + seconds
+                        i += 1
+                    i += 1
+                exists = self._live(key) is not None
+                if ("NX" in options and exists) or ("XX" in options and not exists):
+                    return None
+                self.data[key] = (value, expiry)
+                return "OK"
+            if command == "DEL":
+                return sum(self.data.pop(key, None) is not None for key in args)
+            if command == "EXISTS":
+                return sum(self._live(key) is not None for key in args)
+        return CommandError(f"unknown command '{command}'")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    protocol = 2  # Until the client says HELLO 3
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # Inline command
+        parts = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            parts.append(self.rfile.read(length + 2)[:-2])
+        return parts
+
+    def _reply(self, value) -> bytes:
+        if value is None:
+            return b"_\r\n" if self.protocol == 3 else b"$-1\r\n"
+        if isinstance(value, Exception):
+            return f"-{getattr(value, 'code', 'ERR')} {value}\r\n".encode()
+        if isinstance(value, int):
+            return f":{value}\r\n".encode()
+        if isinstance(value, str):
+            return f"+{value}\r\n".encode()
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _hello(self, args) -> bytes:
+        protocol = self.protocol = int(args[0]) if args else 2
+        fields = [b"+server\r\n+redis\r\n", b"+version\r\n+7.0.0\r\n", b"+proto\r\n:%d\r\n" % protocol]
+        header = b"%%%d\r\n" % len(fields) if protocol == 3 else b"*%d\r\n" % (2 * len(fields))
+        return header + b"".join(fields)
+
+    def handle(self):
+        while True:
+            parts = self._read_command()
+            if not parts:
+                return
+            command = parts[0].decode().upper()
+            if command == "HELLO":
+                self.wfile.write(self._hello(parts[1:]))
+                continue
+            self.wfile.write(self._reply(self.server.execute(command, parts[1:])))
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    server = FakeRedisServer(("127.0.0.1", port))
+    print(f"✅ Fake Redis listening on {server.url}")
+    server.serve_forever()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
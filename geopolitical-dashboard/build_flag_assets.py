@@ -0,0 +1,43 @@
+"""
+Prebuild circular flag images as static Dash assets
+
+Renders every country's circular flag once into assets/flags/ with a
+content-hashed filename and writes assets/flags/manifest.json. The threat
+perception map then references the flags by URL, so browsers fetch and
+cache each flag once instead of receiving it as base64 in every figure.
+
+Run as part of the build (Heroku runs it from bin/post_compile):
+    python build_flag_assets.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flags import FLAG_ASSETS_DIR, FLAG_URLS, build_flag_assets
+
+
+def main():
+    print("=" * 70)
+    print("BUILDING FLAG ASSETS")
+    print("=" * 70)
+    print()
+
+    try:
+        manifest = build_flag_assets(FLAG_URLS)
+    except Exception as e:
+        # The map falls back to inline flags when no manifest exists, so a
+        # failed build (e.g. no network) must not fail the deploy.
+        print(f"❌ Could not build flag assets: {e}")
+        return 0
+
+    for country, url in sorted(manifest.items()):
+        print(f"  {country:15} -> {url}")
+    print()
+    print(f"✅ Wrote {len(manifest)} flags to {FLAG_ASSETS_DIR}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,84 @@
 """
-Mock data module for geopolitical charts
-Provides sample data for all 7 charts
+The dataset behind every chart, loaded once per process.
+
+``get_data`` serves the built-in mock data, a seeded synthetic dataset
+(CHART_DATA_SYNTHETIC) or the file at CHART_DATA_PATH, read through a
+loader picked by its suffix: Parquet and Arrow IPC are memory mapped and
+read column by column as charts ask for them, while a SQLite database is
+queried in place, so filters (``query_data``) and per-country aggregates
+run as indexed SQL. Version tokens (``data_version``, ``columns_version``)
+let caches key on the data without hashing it, and ``columns_digest`` does
+the same across processes and hosts.
+
+Indexes and other structures derived from the rows (``FilterIndex``,
+``InfluenceTensor``, ``SystemsCatalog``, ``RollupCube``, ...) are built
+once per data version. ``start_data_watcher`` reloads CHART_DATA_PATH in
+the background when it changes, and ``export_shared_dataset`` writes the
+loaded data to a memory-backed file that gunicorn workers map instead of
+each loading their own copy.
 """
 
+import hashlib
+import mmap
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+from typing import Callable, NamedTuple
+
 import pandas as pd
 import numpy as np
+from scipy import sparse
+
+
+# Parquet or Arrow IPC (Feather v2) file to serve instead of the built-in
+# mock data; empty uses the mock data
+CHART_DATA_PATH = os.environ.get("CHART_DATA_PATH", "")
+
+# Seeded synthetic dataset served instead of the mock data when
+# CHART_DATA_PATH is unset, e.g. "countries=10000,suppliers=200,years=50,
+# seed=0" ("1" for the defaults); see synthetic_data.py
+CHART_DATA_SYNTHETIC = os.environ.get("CHART_DATA_SYNTHETIC", "")
+
+# Table read when CHART_DATA_PATH is a SQLite database
+CHART_DATA_TABLE = os.environ.get("CHART_DATA_TABLE", "chart_data")
+
+# Directory for the dataset file shared between server workers; /dev/shm is
+# memory-backed on Linux
+SHARED_DATA_DIR = os.environ.get(
+    "SHARED_DATA_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+
+# Set (by gunicorn.conf.py) to a file written by export_shared_dataset;
+# workers map it instead of loading the data themselves
+SHARED_DATA_PATH = os.environ.get("CHART_DATA_SHARED", "")
+_shared_data_tried = False  # Only the first load maps it; reloads read the source
 
+# With copy-on-write (the default from pandas 3) a shallow copy of the cached
+# frame is private to the caller: writes copy the touched columns first
+_COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
 
-def get_data():
+_dataset = None
+_dataset_version = 0
+_dataset_complete = False  # Every column of the source has been loaded
+_dataset_stamp = None  # _source_stamp() from just before the cached frame was read
+_dataset_lock = threading.Lock()
+
+# Version of the last full (re)load, and the version at which refresh_data()
+# last changed each column since then; see columns_version
+_base_version = 0
+_column_versions = {}
+
+# name -> (dataset version, structure), see _derived
+_derived_cache = {}
+# name -> predicate on the column names a derived structure is built from
+_derived_depends = {}
+# Builders may use other derived structures, and load data while holding
+# this: take it before _dataset_lock, never after
+_derived_lock = threading.RLock()
+
+
+def _build_data():
     """Generate comprehensive geopolitical threat perception data."""
     data = {
         "Country": [
@@ -86,14 +157,1466 @@ def get_data():
     return pd.DataFrame(data)
 
 
+# ============================================================================
+# DATA SOURCES
+# ============================================================================
+
+class DataLoader(NamedTuple):
+    """Reads one file format.
+
+    read(path, columns) returns a DataFrame of just ``columns`` (all of them
+    when None); columns(path) lists the file's columns without reading data.
+    """
+    read: Callable
+    columns: Callable
+
+
+def _read_parquet(path: str, columns=None) -> pd.DataFrame:
+    import pyarrow.parquet as pq
+    return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+def _parquet_columns(path: str) -> list:
+    import pyarrow.parquet as pq
+    return [name for name in pq.read_schema(path, memory_map=True).names
+            if not name.startswith("__index_level_")]
+
+
+def _read_arrow_ipc(path: str, columns=None) -> pd.DataFrame:
+    import pyarrow as pa
+    # The table's buffers point into the mapping, so only the projected
+    # columns are ever paged in
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
+
+
+def _arrow_ipc_columns(path: str) -> list:
+    import pyarrow as pa
+    with pa.memory_map(path) as source:
+        return list(pa.ipc.open_file(source).schema.names)
+
+
+# One read-only connection per (thread, database); sqlite3 connections must
+# not be shared between threads. Each thread reopens its connections once
+# the generation has moved on (see close_sqlite_connections)
+_sqlite_local = threading.local()
+_sqlite_generation = 0
+_sqlite_generation_lock = threading.Lock()
+
+
+def _close_thread_sqlite_connections():
+    for connection in getattr(_sqlite_local, "connections", {}).values():
+        connection.close()
+    _sqlite_local.connections = {}
+
+
+def _sqlite_connection(path: str) -> sqlite3.Connection:
+    """This thread's pooled read-only connection to ``path``."""
+    generation = _sqlite_generation
+    if getattr(_sqlite_local, "generation", None) != generation:
+        _close_thread_sqlite_connections()
+        _sqlite_local.generation = generation
+    connection = _sqlite_local.connections.get(path)
+    if connection is None:
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        connection.execute("PRAGMA mmap_size = 268435456")
+        _sqlite_local.connections[path] = connection
+    return connection
+
+
+def close_sqlite_connections():
+    """Close this thread's pooled SQLite connections; others reopen theirs.
+
+    Every other thread closes its own connections and opens new ones on its
+    next query. They are never closed from here, which would break a query
+    another thread has in progress.
+    """
+    global _sqlite_generation
+    with _sqlite_generation_lock:
+        _sqlite_generation += 1
+        generation = _sqlite_generation
+    _close_thread_sqlite_connections()
+    _sqlite_local.generation = generation
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _read_sqlite(path: str, columns=None, where: str = "", params=()) -> pd.DataFrame:
+    connection = _sqlite_connection(path)
+    table = _quote(CHART_DATA_TABLE)
+    if columns is not None and not columns:
+        n_rows = connection.execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+        return pd.DataFrame(index=pd.RangeIndex(n_rows))
+    selected = "*" if columns is None else ", ".join(_quote(c) for c in columns)
+    return pd.read_sql_query(f"SELECT {selected} FROM {table} {where} ORDER BY rowid",
+                             connection, params=params)
+
+
+def _sqlite_columns(path: str) -> list:
+    rows = _sqlite_connection(path).execute(f"PRAGMA table_info({_quote(CHART_DATA_TABLE)})")
+    return [row[1] for row in rows]
+
+
+# File suffix -> loader; add entries to support more formats
+DATA_LOADERS = {
+    ".parquet": DataLoader(_read_parquet, _parquet_columns),
+    ".arrow": DataLoader(_read_arrow_ipc, _arrow_ipc_columns),
+    ".feather": DataLoader(_read_arrow_ipc, _arrow_ipc_columns),
+    ".ipc": DataLoader(_read_arrow_ipc, _arrow_ipc_columns),
+    ".sqlite": DataLoader(_read_sqlite, _sqlite_columns),
+    ".sqlite3": DataLoader(_read_sqlite, _sqlite_columns),
+    ".db": DataLoader(_read_sqlite, _sqlite_columns),
+}
+
+
+def _data_loader():
+    """Loader for CHART_DATA_PATH, or None to serve the mock data.
+
+    Raises:
+        ValueError: CHART_DATA_PATH has a suffix no loader handles
+    """
+    if not CHART_DATA_PATH:
+        return None
+    suffix = os.path.splitext(CHART_DATA_PATH)[1].lower()
+    if suffix not in DATA_LOADERS:
+        raise ValueError(f"No loader for {CHART_DATA_PATH} (supported: {', '.join(DATA_LOADERS)})")
+    return DATA_LOADERS[suffix]
+
+
+def _source_stamp():
+    """(mtime, size) of CHART_DATA_PATH and of a SQLite write-ahead log next
+    to it, each None when the file is missing."""
+    stamp = []
+    for path in (CHART_DATA_PATH, CHART_DATA_PATH + "-wal"):
+        try:
+            st = os.stat(path)
+        except OSError:
+            stamp.append(None)
+        else:
+            stamp.append((st.st_mtime_ns, st.st_size))
+    return tuple(stamp)
+
+
+def _source_columns() -> list:
+    """Every column the configured source provides."""
+    loader = _data_loader()
+    if loader is None:
+        return list(_load_data()[0].columns)
+    return loader.columns(CHART_DATA_PATH)
+
+
+def _read_source(columns=None):
+    """Read ``columns`` (all when None) from the configured source.
+
+    The mock or synthetic data is only served when CHART_DATA_PATH is
+    unset; errors reading a configured file are raised, so the next call
+    tries again rather than serving made-up numbers.
+
+    Returns:
+        (frame with a fresh RangeIndex, whether it is the mock or synthetic
+        data, which always has every column)
+    """
+    loader = _data_loader()
+    if loader is not None:
+        if columns is not None:
+            available = set(loader.columns(CHART_DATA_PATH))
+            columns = [c for c in columns if c in available]
+        return loader.read(CHART_DATA_PATH, columns).reset_index(drop=True), False
+    if CHART_DATA_SYNTHETIC:
+        from synthetic_data import generate_dataset, parse_spec
+        return generate_dataset(**parse_spec(CHART_DATA_SYNTHETIC)), True
+    return _build_data(), True
+
+
+def _load_data(columns=None):
+    """Return (cached dataset, version), loading it on first use.
+
+    A file source is read lazily: only ``columns`` (every column when None)
+    are read, and columns requested later are read and added to the cached
+    frame without changing its version. Columns the source lacks are
+    ignored.
+    """
+    global _dataset, _dataset_complete, _shared_data_tried
+    with _dataset_lock:
+        if _dataset is None and SHARED_DATA_PATH and not _shared_data_tried:
+            _shared_data_tried = True
+            _attach_shared_dataset(SHARED_DATA_PATH)
+        if _dataset is None:
+            stamp = _source_stamp()
+            df, is_mock = _read_source(columns)
+            _replace_dataset(df, is_mock or columns is None, stamp)
+        elif not _dataset_complete:
+            wanted = None if columns is None else [c for c in columns if c not in _dataset.columns]
+            if wanted is None or wanted:
+                stamp = _source_stamp()
+                extra, _ = _read_source(wanted)  # Only file sources load lazily
+                if stamp == _dataset_stamp and len(extra) == len(_dataset):
+                    extra = extra[[c for c in extra.columns if c not in _dataset.columns]]
+                    _dataset = pd.concat([_dataset, compact_dtypes(extra)], axis=1)
+                    _dataset_complete = columns is None
+                else:
+                    # The file changed since the cached columns were read;
+                    # splicing would mix rows of two versions of it
+                    stamp = _source_stamp()
+                    df, _ = _read_source(None if columns is None else list(_dataset.columns) + wanted)
+                    _replace_dataset(df, columns is None, stamp)
+        # Travels with every copy, so filter_data can recognise frames that
+        # still line up with the cached filter index
+        _dataset.attrs["data_version"] = _dataset_version
+        return _dataset, _dataset_version
+
+
+def _replace_dataset(df: pd.DataFrame, complete: bool, stamp):
+    """Cache ``df`` as a full (re)load under a new version; hold _dataset_lock."""
+    global _dataset, _dataset_version, _dataset_complete, _dataset_stamp, _base_version
+    _dataset = compact_dtypes(df)
+    _dataset_complete = complete
+    _dataset_stamp = stamp
+    _dataset_version += 1
+    _base_version = _dataset_version
+    _column_versions.clear()
+
+
+def _derived(name: str, build, wants=None, depends=None):
+    """Structure derived from the dataset, rebuilt when its version changes.
+
+    Args:
+        name: Cache slot
+        build: Called with the dataset frame to (re)build the structure
+        wants: Predicate on column names; matching columns are loaded
+            before building. Defaults to every column.
+        depends: Predicate on the column names the structure is built
+            from, so refresh_data() keeps it when none of them changed.
+            Defaults to ``wants``.
+    """
+    _derived_depends[name] = depends or wants
+    columns = None
+    if wants is not None and not _dataset_complete:
+        columns = [c for c in _source_columns() if wants(c)]
+    df, version = _load_data(columns)
+    with _derived_lock:
+        cached = _derived_cache.get(name)
+        if cached is None or cached[0] != version:
+            cached = (version, build(df))
+            _derived_cache[name] = cached
+        return cached[1]
+
+
+def get_data(columns=None, copy: bool = False) -> pd.DataFrame:
+    """Return the dataset, loaded once per process and shared by all callers.
+
+    The data comes from CHART_DATA_PATH (Parquet or Arrow IPC, memory
+    mapped) when set, else from the built-in mock data.
+
+    Each call returns a new frame object over the shared columns, so callers
+    may add, drop or overwrite columns without affecting anyone else (on
+    pandas 2 without copy-on-write enabled this falls back to a deep copy).
+
+    Args:
+        columns: Only return (and, from a file, only read) these columns;
+            ones the source lacks are left out. Defaults to every column.
+        copy: Return an eager deep copy, for callers that mutate values in
+            place in bulk and would otherwise copy column by column anyway
+    """
+    df, _ = _load_data(columns)
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    if copy or not _COPY_ON_WRITE:
+        return df.copy(deep=True)
+    return df.copy(deep=False)
+
+
+def data_version() -> int:
+    """Version token of the dataset get_data() returns.
+
+    Increases every time the dataset is (re)loaded, so figure caches can key
+    on it instead of hashing frames.
+    """
+    return _load_data([])[1]
+
+
+def reset_dataset():
+    """Drop the cached dataset and everything derived from it.
+
+    Nothing is loaded until the data is next used.
+    """
+    global _dataset, _dataset_complete
+    with _derived_lock, _dataset_lock:
+        _dataset = None
+        _dataset_complete = False
+        _column_versions.clear()
+        _derived_cache.clear()
+
+
+def reload_data() -> int:
+    """Drop the cached dataset and load it again.
+
+    Returns:
+        The new version token
+    """
+    reset_dataset()
+    return data_version()
+
+
+def columns_version(columns) -> int:
+    """Version token that only changes when one of ``columns`` changes.
+
+    Equal to data_version() after a full (re)load. refresh_data() then
+    raises it only for the columns it changed, so a figure cache keyed on
+    the columns it plots survives edits to the rest of the dataset.
+    """
+    data_version()
+    with _dataset_lock:
+        return max([_base_version] + [_column_versions.get(c, _base_version) for c in columns])
+
+
+# column -> (its columns_version, digest of its values), see columns_digest;
+# guarded by _derived_lock, like the derived structures
+_column_digests = {}
+
+
+def columns_digest(columns) -> str:
+    """Digest of the values of ``columns``, equal in every process serving the same data.
+
+    Version tokens count (re)loads within one process, so caches shared
+    between workers or hosts key on this instead. Each column is hashed once
+    per column version. A SQLite source's rows aren't held in memory, so
+    its digest covers the file's path and the size and modification time of
+    the database and its write-ahead log (_source_stamp) instead.
+    """
+    digest = hashlib.sha256()
+    if _sqlite_source():
+        digest.update(f"{os.path.abspath(CHART_DATA_PATH)}:{_source_stamp()}".encode())
+        return digest.hexdigest()
+    df = get_data(columns)
+    with _derived_lock:
+        for column in sorted(df.columns):
+            version = columns_version([column])
+            cached = _column_digests.get(column)
+            if cached is None or cached[0] != version:
+                hashes = pd.util.hash_pandas_object(df[column], index=False).to_numpy()
+                cached = (version, hashlib.sha256(hashes.tobytes()).hexdigest())
+                _column_digests[column] = cached
+            digest.update(f"{column}={cached[1]};".encode())
+    return digest.hexdigest()
+
+
+# ============================================================================
+# WATCHING THE SOURCE
+# ============================================================================
+
+# Seconds between checks of CHART_DATA_PATH for changes; 0 disables the
+# watcher
+DATA_WATCH_INTERVAL = float(os.environ.get("CHART_DATA_WATCH_INTERVAL", "5"))
+
+# Most recent changes kept for data_changes()
+_MAX_CHANGES = 100
+
+
+class DataChange(NamedTuple):
+    """What one refresh_data() call changed."""
+    version: int
+    columns: frozenset
+    countries: frozenset
+
+
+_changes = []
+
+
+def _diff_frames(old: pd.DataFrame, new: pd.DataFrame):
+    """(changed columns, changed countries) between two loads of the dataset.
+
+    Rows are matched by position. When the row count differs, or columns
+    were added or removed, every row counts as changed.
+    """
+    columns = set(old.columns) ^ set(new.columns)
+    if len(old) != len(new):
+        columns |= set(old.columns)
+        changed = None
+    else:
+        changed = np.zeros(len(new), dtype=bool)
+        for column in old.columns.intersection(new.columns):
+            if old[column].equals(new[column]):
+                continue
+            # As objects, so categoricals with different categories compare
+            a = old[column].to_numpy(dtype=object)
+            b = new[column].to_numpy(dtype=object)
+            rows = ~((a == b) | (pd.isna(a) & pd.isna(b)))
+            if rows.any():
+                columns.add(column)
+                changed |= rows
+        if set(old.columns) != set(new.columns):
+            changed[:] = True
+    countries = set()
+    for df in (old, new):
+        if "Country" in df.columns:
+            country = df["Country"] if changed is None else df["Country"][changed]
+            countries.update(country.astype(object))
+    return columns, countries
+
+
+def refresh_data():
+    """Re-read CHART_DATA_PATH and apply what changed since the last load.
+
+    The columns loaded so far are read again and compared row by row with
+    the cached ones. If anything differs the dataset version is bumped, the
+    changed columns get the new version (see columns_version) and only the
+    derived structures built from them are dropped; the rest are kept for
+    the new version. A SQLite source is not compared: its pooled
+    connections are reopened, every column counts as changed and no
+    countries are reported.
+
+    Read errors are raised and leave the current data in place.
+
+    Returns:
+        DataChange, or None when nothing changed (or nothing is loaded yet)
+    """
+    return _refresh()[1]
+
+
+def _refresh():
+    """refresh_data(), also reporting whether it got to compare anything.
+
+    Returns:
+        (False when nothing is loaded or it was replaced meanwhile, else
+        True; DataChange or None)
+    """
+    global _dataset, _dataset_version, _dataset_stamp
+    loader = _data_loader()
+    if loader is None or _dataset is None:
+        return False, None
+    old = _dataset
+    stamp = _source_stamp()
+    wanted = None if _dataset_complete else list(old.columns)
+    if _sqlite_source():
+        close_sqlite_connections()
+    if wanted is not None:
+        available = set(loader.columns(CHART_DATA_PATH))
+        wanted = [c for c in wanted if c in available]
+    new = compact_dtypes(loader.read(CHART_DATA_PATH, wanted).reset_index(drop=True))
+    if _sqlite_source():
+        columns, countries = set(_source_columns()), set()
+    else:
+        columns, countries = _diff_frames(old, new)
+    if not columns:
+        with _dataset_lock:
+            if _dataset is old:
+                _dataset_stamp = stamp  # The cached columns still match it
+        return True, None
+
+    with _derived_lock, _dataset_lock:
+        if _dataset is not old:
+            return False, None  # Reset or refreshed meanwhile
+        _dataset_stamp = stamp
+        _dataset_version += 1
+        _dataset = new
+        _dataset.attrs["data_version"] = _dataset_version
+        for column in columns:
+            _column_versions[column] = _dataset_version
+        same_rows = len(old) == len(new)
+        for name, (version, structure) in list(_derived_cache.items()):
+            depends = _derived_depends.get(name)
+            if same_rows and depends is not None and not any(depends(c) for c in columns):
+                _derived_cache[name] = (_dataset_version, structure)
+            else:
+                del _derived_cache[name]
+        change = DataChange(_dataset_version, frozenset(columns), frozenset(countries))
+        _changes.append(change)
+        del _changes[:-_MAX_CHANGES]
+    print(f"✅ Reloaded {CHART_DATA_PATH} as v{change.version}: {len(columns)} column(s), "
+          f"{len(countries)} countr{'y' if len(countries) == 1 else 'ies'} changed")
+    return True, change
+
+
+def data_changes(since: int = 0) -> list:
+    """DataChange records (oldest first) for versions after ``since``."""
+    with _dataset_lock:
+        return [change for change in _changes if change.version > since]
+
+
+class DataWatcher:
+    """Background thread that calls refresh_data() when the source changes.
+
+    Polls the modification time and size of CHART_DATA_PATH (and of a
+    SQLite write-ahead log next to it), which works on every platform and
+    file system, unlike inotify. A failed read (e.g. a file still being
+    written) is retried on the next poll; replacing the file atomically
+    (write elsewhere, then rename) avoids those.
+    """
+
+    def __init__(self, interval: float = DATA_WATCH_INTERVAL):
+        self.interval = interval
+        self._stamp = _source_stamp()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="chart-data-watcher", daemon=True)
+
+    def check(self):
+        """Refresh the data if the source changed since the last check.
+
+        Returns:
+            DataChange, or None
+        """
+        stamp = _source_stamp()
+        if stamp == self._stamp or stamp[0] is None:
+            return None
+        compared, change = _refresh()
+        # Only once the read succeeded and was compared, and only if nothing
+        # was written meanwhile; otherwise the next check reads it again
+        if compared and _source_stamp() == stamp:
+            self._stamp = stamp
+        return change
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"❌ Could not reload {CHART_DATA_PATH}: {e}")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+_watcher = None
+
+
+def start_data_watcher(interval: float = None):
+    """Start this process's DataWatcher, once.
+
+    Does nothing when CHART_DATA_PATH is unset (the mock data never
+    changes) or the interval is 0.
+
+    Returns:
+        The running DataWatcher, or None
+    """
+    global _watcher
+    interval = DATA_WATCH_INTERVAL if interval is None else interval
+    if _watcher is None and CHART_DATA_PATH and interval > 0:
+        _watcher = DataWatcher(interval).start()
+    return _watcher
+
+
+# ============================================================================
+# SHARED DATASET
+# ============================================================================
+
+# File layout: 8-byte header length, pickled header, then the pickle's
+# out-of-band buffers (every NumPy array) at aligned offsets
+_SHARED_ALIGNMENT = 64
+
+
+def export_shared_dataset(directory: str = None) -> str:
+    """Write the dataset and everything derived from it to one mappable file.
+
+    Loads every column, builds the filter index, influence tensor, systems
+    catalog and code lists, and pickles them all (protocol 5) with the array
+    data stored out of band. Processes that attach the file get NumPy
+    arrays that are views into the same pages, so N workers hold one copy.
+
+    A SQLite source is not exported: that would load the whole table, which
+    may not fit in memory, and workers query the database file directly.
+
+    Returns:
+        Path of the file, or None for a SQLite source
+    """
+    if _sqlite_source():
+        return None
+    get_data()
+    for build in (get_filter_index, get_influence_tensor, get_systems_catalog, get_code_lists):
+        build()
+    with _derived_lock, _dataset_lock:
+        state = {
+            "version": _dataset_version,
+            "stamp": _dataset_stamp,
+            "dataset": _dataset,
+            "derived": {name: structure for name, (version, structure) in _derived_cache.items()
+                        if version == _dataset_version},
+        }
+        buffers = []
+        payload = pickle.dumps(state, protocol=5, buffer_callback=buffers.append)
+
+    spans, offset = [], 0
+    for buffer in buffers:
+        raw = buffer.raw()
+        spans.append((offset, raw.nbytes))
+        offset += -(-raw.nbytes // _SHARED_ALIGNMENT) * _SHARED_ALIGNMENT
+    header = pickle.dumps((payload, spans), protocol=5)
+    start = -(-(8 + len(header)) // _SHARED_ALIGNMENT) * _SHARED_ALIGNMENT
+
+    directory = directory or SHARED_DATA_DIR
+    path = os.path.join(directory, f"chart_data-{os.getpid()}-v{state['version']}.bin")
+    fd, tmp = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for buffer, (buffer_offset, _) in zip(buffers, spans):
+            f.seek(start + buffer_offset)
+            f.write(buffer.raw())
+    os.replace(tmp, path)
+    print(f"✅ Shared dataset v{state['version']} ({start + offset:,} bytes) at {path}")
+    return path
+
+
+def _attach_shared_dataset(path: str):
+    """Install the dataset and derived structures from an exported file.
+
+    Called with _dataset_lock held, for the first load only: the file is a
+    snapshot of the data when the server started, so reloads read the
+    source. The snapshot's version is raised past this process's if needed,
+    so versions never go backwards. On failure the data is loaded normally.
+    """
+    global _dataset, _dataset_version, _dataset_complete, _dataset_stamp, _base_version
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        header_length = int.from_bytes(view[:8], "little")
+        payload, spans = pickle.loads(view[8:8 + header_length])
+        start = -(-(8 + header_length) // _SHARED_ALIGNMENT) * _SHARED_ALIGNMENT
+        # Read-only views into the mapping: the arrays are never copied
+        state = pickle.loads(payload, buffers=[view[start + o:start + o + n] for o, n in spans])
+    except Exception as e:
+        print(f"❌ Could not attach shared dataset {path}: {e}")
+        return
+    _dataset = state["dataset"]
+    _dataset_version = _base_version = max(state["version"], _dataset_version + 1)
+    _dataset_complete = True
+    _dataset_stamp = state["stamp"]
+    _column_versions.clear()
+    # Not under _derived_lock, which may only be taken before _dataset_lock;
+    # nothing can be cached for a version newer than any so far anyway
+    for name, structure in state["derived"].items():
+        _derived_cache[name] = (_dataset_version, structure)
+
+
+# ============================================================================
+# DTYPES AND CODE LISTS
+# ============================================================================
+
+# Label columns stored as Categoricals: each distinct string is kept once
+# and rows hold small integer codes
+CATEGORICAL_COLUMNS = ["Country", "Threat Perception", "Defense Priorities", "Suppliers"]
+SYSTEMS_PREFIX = "Systems_"
+
+# Comma-separated columns also exposed as code lists, see get_code_lists
+MULTI_VALUE_COLUMNS = ["Suppliers", "Defense Priorities"]
+
+# Entries of comma-separated columns that mean "nothing"
+_EMPTY_VALUES = {"", "None", "N/A"}
+
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Re-encode ``df`` with compact dtypes.
+
+    Label and Systems_* columns become Categoricals, *_numeric columns
+    float32 (the 0-3 scores are half steps, which float32 holds exactly) and
+    other integer columns the smallest integer dtype that fits.
+    """
+    df = df.copy()
+    for column in df.columns:
+        if column in CATEGORICAL_COLUMNS or column.startswith(SYSTEMS_PREFIX):
+            df[column] = df[column].astype("category")
+        elif column.endswith("_numeric"):
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(np.float32)
+        elif pd.api.types.is_integer_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+def _split_entries(text) -> list:
+    """Entries listed in one comma- or semicolon-separated cell."""
+    if pd.isna(text):
+        return []
+    entries = (entry.strip() for entry in str(text).replace(";", ",").split(","))
+    return [entry for entry in entries if entry not in _EMPTY_VALUES]
+
+
+def _listed_entries(text) -> int:
+    """Entries written in one cell, placeholder words included; 0 for blank or "N/A"."""
+    if pd.isna(text) or text in ("", "N/A"):
+        return 0
+    return sum(1 for entry in str(text).replace(";", ",").split(",") if entry.strip())
+
+
+class CodeList:
+    """A comma-separated column as per-row lists of vocabulary codes.
+
+    Row ``i`` lists ``vocabulary[codes[offsets[i]:offsets[i + 1]]]``. Each
+    distinct cell is split once, so encoding costs one split per category
+    rather than per row.
+    """
+
+    def __init__(self, series: pd.Series):
+        categorical = series.astype("category")
+        vocabulary = {}
+        cell_codes = []
+        for text in categorical.cat.categories:
+            cell_codes.append([vocabulary.setdefault(e, len(vocabulary)) for e in _split_entries(text)])
+        self.vocabulary = list(vocabulary)
+        self.code_index = vocabulary
+
+        # Per-category lists, plus an empty list that missing cells map to
+        cell_lengths = np.array([len(c) for c in cell_codes] + [0], dtype=np.int64)
+        cell_starts = np.concatenate([[0], np.cumsum(cell_lengths)[:-1]])
+        flat = np.array([code for codes in cell_codes for code in codes], dtype=np.int32)
+
+        row_cells = categorical.cat.codes.to_numpy().astype(np.int64)
+        row_cells[row_cells < 0] = len(cell_codes)
+        lengths = cell_lengths[row_cells]
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)])
+        within = np.arange(self.offsets[-1]) - np.repeat(self.offsets[:-1], lengths)
+        self.codes = flat[np.repeat(cell_starts[row_cells], lengths) + within]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.codes.nbytes
+
+    def rows(self) -> np.ndarray:
+        """Row position of each entry in ``codes``."""
+        return np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+    def entries(self, row: int) -> list:
+        """Entries listed in row ``row``."""
+        return [self.vocabulary[c] for c in self.codes[self.offsets[row]:self.offsets[row + 1]]]
+
+
+def get_code_lists() -> dict:
+    """{column: CodeList} for the dataset's comma-separated columns."""
+    return _derived("code_lists", lambda df: {
+        column: CodeList(df[column]) for column in MULTI_VALUE_COLUMNS if column in df.columns},
+        wants=lambda c: c in MULTI_VALUE_COLUMNS)
+
+
+# ============================================================================
+# FILTERING
+# ============================================================================
+
+# filter_data keyword -> column it filters on
+FILTER_CATEGORY_COLUMNS = {"countries": "Country", "threats": "Threat Perception"}
+FILTER_MULTI_VALUE_COLUMNS = {"suppliers": "Suppliers", "priorities": "Defense Priorities"}
+FILTER_RANGE_COLUMNS = {"spend_range": "Avg_Spend"}
+
+# Influence_<supplier>_numeric columns back the min_influence filter
+INFLUENCE_PREFIX = "Influence_"
+INFLUENCE_SUFFIX = "_numeric"
+
+# Categories on fewer than 1 in this many rows keep int32 row positions
+# instead of a packed bitmap, which would then be larger
+_SPARSE_ROWS_RATIO = 32
+
+
+def _bitmaps_from_codes(rows, codes, uniques, n_rows):
+    """Row set per category, from parallel (row, category code) arrays.
+
+    Each set is a packed row bitmap (uint8), or the ascending row positions
+    (int32) of a category on fewer than 1/_SPARSE_ROWS_RATIO of the rows,
+    so thousands of countries don't cost a full-length bitmap each.
+    """
+    order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(uniques)))])
+    position_dtype = np.int32 if n_rows <= np.iinfo(np.int32).max else np.int64
+    bitmaps = {}
+    for code, value in enumerate(uniques):
+        positions = rows[order[bounds[code]:bounds[code + 1]]]
+        if len(positions) * _SPARSE_ROWS_RATIO < n_rows:
+            bitmaps[value] = positions.astype(position_dtype)
+            continue
+        mask = np.zeros(n_rows, dtype=bool)
+        mask[positions] = True
+        bitmaps[value] = np.packbits(mask)
+    return bitmaps
+
+
+class FilterIndex:
+    """Per-column indexes over one frame, so filters resolve with array ops.
+
+    Category columns get a packed bitmap per value; comma-separated columns
+    (Suppliers, Defense Priorities) get a bitmap per listed entry (rare
+    values keep row positions instead, see _bitmaps_from_codes); numeric
+    columns get a sorted copy plus each row's rank in it, so a range is a
+    pair of binary searches and one comparison over the ranks. Predicates
+    are combined with bitwise AND over the bitmaps.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.n_rows = len(df)
+        self.row_index = df.index
+        self._bitmaps = {}
+        self._sorted = {}
+
+        for column in FILTER_CATEGORY_COLUMNS.values():
+            if column in df.columns:
+                codes, uniques = pd.factorize(df[column])
+                valid = codes >= 0
+                self._bitmaps[column] = _bitmaps_from_codes(
+                    np.flatnonzero(valid), codes[valid], list(uniques), self.n_rows)
+
+        for column in FILTER_MULTI_VALUE_COLUMNS.values():
+            if column in df.columns:
+                code_list = CodeList(df[column])
+                self._bitmaps[column] = _bitmaps_from_codes(
+                    code_list.rows(), code_list.codes, code_list.vocabulary, self.n_rows)
+
+        range_columns = list(FILTER_RANGE_COLUMNS.values()) + [
+            c for c in df.columns if c.startswith(INFLUENCE_PREFIX) and c.endswith(INFLUENCE_SUFFIX)]
+        for column in range_columns:
+            if column in df.columns:
+                values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+                order = np.argsort(values, kind="stable")  # NaNs sort last
+                rank = np.empty(self.n_rows, dtype=np.int64)
+                rank[order] = np.arange(self.n_rows)
+                self._sorted[column] = (values[order], rank, int(np.count_nonzero(~np.isnan(values))))
+
+    def values(self, column: str) -> list:
+        """Distinct values indexed for a category or comma-separated column."""
+        return list(self._bitmaps[column])
+
+    def _category_bitmap(self, column, selected):
+        if column not in self._bitmaps:
+            raise KeyError(f"Cannot filter on missing column {column!r}")
+        if isinstance(selected, str):
+            selected = [selected]
+        bitmaps = self._bitmaps[column]
+        hits = [bitmaps[v] for v in selected if v in bitmaps]
+        positions = [h for h in hits if h.dtype != np.uint8]
+        hits = [h for h in hits if h.dtype == np.uint8]
+        if positions:
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[np.concatenate(positions)] = True
+            hits.append(np.packbits(mask))
+        if not hits:
+            return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        return np.bitwise_or.reduce(hits) if len(hits) > 1 else hits[0]
+
+    def _range_bitmap(self, column, low=None, high=None):
+        if column not in self._sorted:
+            raise KeyError(f"Cannot filter on missing column {column!r}")
+        sorted_values, rank, n_valid = self._sorted[column]
+        start = 0 if low is None else np.searchsorted(sorted_values[:n_valid], low, side="left")
+        stop = n_valid if high is None else np.searchsorted(sorted_values[:n_valid], high, side="right")
+        # Rows whose rank in the sorted order falls inside [start, stop)
+        return np.packbits((rank >= start) & (rank < stop))
+
+    def select(self, countries=None, suppliers=None, threats=None, priorities=None,
+               spend_range=None, min_influence=None):
+        """Row positions matching every given predicate.
+
+        Args:
+            countries, threats: Value or list of values to keep
+            suppliers, priorities: Keep rows listing any of these entries
+            spend_range: (low, high) on Avg_Spend, inclusive; either end may
+                be None
+            min_influence: {supplier: threshold}, e.g. {"Russia": 2.5}, on
+                the Influence_<supplier>_numeric columns
+
+        Returns:
+            Sorted row positions, or None when no predicate was given. Empty
+            values (None, [], {}) mean "don't filter".
+        """
+        bitmaps = []
+        for selected, column in ((countries, FILTER_CATEGORY_COLUMNS["countries"]),
+                                 (threats, FILTER_CATEGORY_COLUMNS["threats"]),
+                                 (suppliers, FILTER_MULTI_VALUE_COLUMNS["suppliers"]),
+                                 (priorities, FILTER_MULTI_VALUE_COLUMNS["priorities"])):
+            if selected:
+                bitmaps.append(self._category_bitmap(column, selected))
+        if spend_range:
+            bitmaps.append(self._range_bitmap(FILTER_RANGE_COLUMNS["spend_range"], *spend_range))
+        for supplier, threshold in (min_influence or {}).items():
+            if threshold is not None:
+                column = f"{INFLUENCE_PREFIX}{supplier}{INFLUENCE_SUFFIX}"
+                bitmaps.append(self._range_bitmap(column, low=threshold))
+
+        if not bitmaps:
+            return None
+        combined = np.bitwise_and.reduce(bitmaps) if len(bitmaps) > 1 else bitmaps[0]
+        return np.flatnonzero(np.unpackbits(combined, count=self.n_rows))
+
+
+def get_filter_index() -> FilterIndex:
+    """FilterIndex over the cached dataset, rebuilt when its version changes."""
+    return _derived("filter_index", FilterIndex, wants=lambda c: (
+        c in FILTER_CATEGORY_COLUMNS.values() or c in FILTER_MULTI_VALUE_COLUMNS.values()
+        or c in FILTER_RANGE_COLUMNS.values() or (c.startswith(INFLUENCE_PREFIX) and c.endswith(INFLUENCE_SUFFIX))))
+
+
+def _has_filters(min_influence=None, **kwargs) -> bool:
+    """Whether FilterIndex.select would apply any predicate to these filters."""
+    return any(kwargs.values()) or any(t is not None for t in (min_influence or {}).values())
+
+
 def filter_data(df, **kwargs):
-    """Filter data based on provided kwargs."""
-    # This is a placeholder - in a real app, this would filter based on various criteria
+    """Filter data based on provided kwargs.
+
+    Frames returned by get_data() (or column subsets of them) use the
+    cached FilterIndex; any other frame is indexed on the fly. See
+    FilterIndex.select for the supported filters.
+    """
+    if not _has_filters(**kwargs):
+        return df
+    index = get_filter_index()
+    if (df.attrs.get("data_version") != data_version() or len(df) != index.n_rows
+            or not df.index.equals(index.row_index)):
+        index = FilterIndex(df)
+
+    positions = index.select(**kwargs)
+    if positions is None or len(positions) == index.n_rows:
+        return df
+    return df.iloc[positions]
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+# Side table of a SQLite database listing each comma-separated entry per row,
+# so supplier and priority filters can use an index
+SQLITE_ENTRIES_TABLE = "chart_data_entries"
+
+
+def _sqlite_source() -> bool:
+    """Whether the configured source is a SQLite database."""
+    loader = _data_loader()
+    return loader is not None and loader.read is _read_sqlite
+
+
+def _filter_sql(countries=None, suppliers=None, threats=None, priorities=None,
+                spend_range=None, min_influence=None):
+    """FilterIndex.select's predicates as a SQL WHERE clause and parameters."""
+    clauses, params = [], []
+
+    def as_list(selected):
+        return [selected] if isinstance(selected, str) else list(selected)
+
+    for selected, column in ((countries, FILTER_CATEGORY_COLUMNS["countries"]),
+                             (threats, FILTER_CATEGORY_COLUMNS["threats"])):
+        if selected:
+            values = as_list(selected)
+            clauses.append(f"{_quote(column)} IN ({', '.join('?' * len(values))})")
+            params += values
+    # Entries are common (a supplier is listed on a large share of rows), so
+    # when another predicate can drive the query, check entries per row
+    # rather than letting SQLite start from the entries index
+    correlated = bool(clauses or spend_range or min_influence)
+    for selected, column in ((suppliers, FILTER_MULTI_VALUE_COLUMNS["suppliers"]),
+                             (priorities, FILTER_MULTI_VALUE_COLUMNS["priorities"])):
+        if selected:
+            values = as_list(selected)
+            entries = f"column_name = ? AND entry IN ({', '.join('?' * len(values))})"
+            if correlated:
+                clauses.append(f"EXISTS (SELECT 1 FROM {SQLITE_ENTRIES_TABLE} "
+                               f"WHERE row_id = {_quote(CHART_DATA_TABLE)}.rowid AND {entries})")
+            else:
+                clauses.append(f"rowid IN (SELECT row_id FROM {SQLITE_ENTRIES_TABLE} WHERE {entries})")
+            params += [column] + values
+    if spend_range:
+        low, high = spend_range
+        column = _quote(FILTER_RANGE_COLUMNS["spend_range"])
+        if low is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(low)
+        if high is not None:
+            clauses.append(f"{column} <= ?")
+            params.append(high)
+    for supplier, threshold in (min_influence or {}).items():
+        if threshold is not None:
+            clauses.append(f"{_quote(f'{INFLUENCE_PREFIX}{supplier}{INFLUENCE_SUFFIX}')} >= ?")
+            params.append(threshold)
+
+    return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def query_data(columns=None, **filters) -> pd.DataFrame:
+    """Rows matching ``filters``, with only ``columns``.
+
+    With a SQLite source the filters run as SQL against its indexes and
+    only the matching rows are read. Otherwise this is
+    filter_data(get_data(columns), **filters), reading the filter columns
+    from the cached index.
+
+    Args:
+        columns: Columns to return (missing ones are left out); all when None
+        filters: As for FilterIndex.select
+    """
+    if not _sqlite_source():
+        return filter_data(get_data(columns), **filters)
+    if columns is not None:
+        available = set(_source_columns())
+        columns = [c for c in columns if c in available]
+    where, params = _filter_sql(**filters)
+    df = compact_dtypes(_read_sqlite(CHART_DATA_PATH, columns, where, params))
+    df.attrs["data_version"] = data_version()
     return df
 
 
-# Mock FILTER_CALLBACK_INPUTS for compatibility
-FILTER_CALLBACK_INPUTS = {}
+def country_means(columns, **filters) -> pd.DataFrame:
+    """Mean of each numeric column per country, over rows matching ``filters``.
+
+    With a SQLite source this is one GROUP BY query. Countries appear in
+    order of first appearance; the result is indexed by Country.
+    """
+    if not _sqlite_source():
+        df = query_data(["Country"] + list(columns), **filters)
+        present = [c for c in columns if c in df.columns]
+        return df.groupby("Country", observed=True, sort=False)[present].mean()
+
+    available = set(_source_columns())
+    present = [c for c in columns if c in available]
+    where, params = _filter_sql(**filters)
+    selected = ", ".join(f"AVG({_quote(c)}) AS {_quote(c)}" for c in present)
+    sql = (f"SELECT Country{', ' + selected if selected else ''} FROM {_quote(CHART_DATA_TABLE)} "
+           f"{where} GROUP BY Country ORDER BY MIN(rowid)")
+    return pd.read_sql_query(sql, _sqlite_connection(CHART_DATA_PATH), params=params,
+                             index_col="Country")
+
+
+def country_year_sums(columns, **filters):
+    """Sum and count of each numeric column per (Country, Year).
+
+    Only non-missing values are summed and counted. Rows of data without a
+    YEAR_COLUMN all fall in SNAPSHOT_YEAR. With a SQLite source this is one
+    GROUP BY query.
+
+    Returns:
+        (sums, counts) frames with the same (Country, Year) index, groups in
+        order of first appearance
+    """
+    if not _sqlite_source():
+        df = query_data(["Country", YEAR_COLUMN] + list(columns), **filters)
+        present = [c for c in columns if c in df.columns]
+        year = df[YEAR_COLUMN] if YEAR_COLUMN in df.columns else pd.Series(SNAPSHOT_YEAR, index=df.index)
+        values = df[present].apply(pd.to_numeric, errors="coerce")
+        grouped = values.groupby([df["Country"], year.rename(YEAR_COLUMN)], observed=True, sort=False)
+        return grouped.sum(), grouped.count()
+
+    available = set(_source_columns())
+    present = [c for c in columns if c in available]
+    year = _quote(YEAR_COLUMN) if YEAR_COLUMN in available else str(SNAPSHOT_YEAR)
+    where, params = _filter_sql(**filters)
+    selected = "".join(f", TOTAL({_quote(c)}), COUNT({_quote(c)})" for c in present)
+    sql = (f"SELECT Country, {year}{selected} FROM {_quote(CHART_DATA_TABLE)} {where} "
+           f"GROUP BY 1, 2 ORDER BY MIN(rowid)")
+    df = pd.read_sql_query(sql, _sqlite_connection(CHART_DATA_PATH), params=params)
+    df.columns = ["Country", YEAR_COLUMN] + [f"{kind}:{c}" for c in present for kind in ("sum", "count")]
+    df = df.set_index(["Country", YEAR_COLUMN])
+    sums = df[[f"sum:{c}" for c in present]].set_axis(present, axis=1)
+    counts = df[[f"count:{c}" for c in present]].set_axis(present, axis=1)
+    return sums, counts
+
+
+def build_sqlite_database(df: pd.DataFrame, path: str):
+    """Write ``df`` to a SQLite database that query_data can push down into.
+
+    Creates the data table (CHART_DATA_TABLE), the entries side table for
+    Suppliers and Defense Priorities, and indexes on every filter column.
+    """
+    df = df.reset_index(drop=True)
+    with sqlite3.connect(path) as connection:
+        # Rows are inserted in order, so row i gets rowid i + 1
+        frame = df.astype({c: str for c in df.columns if df[c].dtype == "category"})
+        frame.to_sql(CHART_DATA_TABLE, connection, if_exists="replace", index=False)
+        connection.execute(f"DROP TABLE IF EXISTS {SQLITE_ENTRIES_TABLE}")
+        connection.execute(f"CREATE TABLE {SQLITE_ENTRIES_TABLE} "
+                           f"(column_name TEXT, entry TEXT, row_id INTEGER)")
+        for column in FILTER_MULTI_VALUE_COLUMNS.values():
+            if column in df.columns:
+                code_list = CodeList(df[column])
+                connection.executemany(
+                    f"INSERT INTO {SQLITE_ENTRIES_TABLE} VALUES (?, ?, ?)",
+                    ((column, code_list.vocabulary[code], int(row) + 1)
+                     for row, code in zip(code_list.rows(), code_list.codes)))
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {SQLITE_ENTRIES_TABLE}_entry "
+                           f"ON {SQLITE_ENTRIES_TABLE} (column_name, entry, row_id)")
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {SQLITE_ENTRIES_TABLE}_row "
+                           f"ON {SQLITE_ENTRIES_TABLE} (row_id, column_name, entry)")
+        indexed = [c for c in df.columns if c in FILTER_CATEGORY_COLUMNS.values()
+                   or c in FILTER_RANGE_COLUMNS.values()
+                   or (c.startswith(INFLUENCE_PREFIX) and c.endswith(INFLUENCE_SUFFIX))]
+        for i, column in enumerate(indexed):
+            connection.execute(f"CREATE INDEX IF NOT EXISTS {CHART_DATA_TABLE}_{i} "
+                               f"ON {_quote(CHART_DATA_TABLE)} ({_quote(column)})")
+        # Statistics let the planner pick the most selective index
+        connection.execute("ANALYZE")
+
+
+# ============================================================================
+# INFLUENCE TENSOR
+# ============================================================================
+
+# Axes of the tensor; column <metric>_<supplier>_numeric holds each value
+TENSOR_SUPPLIERS = ["US", "Russia", "China", "Turkiye_Israel"]
+TENSOR_METRICS = ["Influence", "Matrix"]
+TENSOR_COLUMNS = [f"{m}_{s}_numeric" for s in TENSOR_SUPPLIERS for m in TENSOR_METRICS]
+
+
+def _country_rows(country_index: dict, countries) -> list:
+    """Rows of ``countries`` in an array keyed by ``country_index``.
+
+    The per-country arrays below carry one extra all-zero last row, which
+    unknown countries map to, so looking them up needs no masking.
+    """
+    return [country_index.get(c, -1) for c in countries]
+
+
+class InfluenceTensor:
+    """Dense country x supplier x metric array of the *_numeric columns.
+
+    ``values[c, s, m]`` holds metric ``TENSOR_METRICS[m]`` of supplier
+    ``TENSOR_SUPPLIERS[s]`` in country ``countries[c]`` (first row per
+    country of ``df``; get_influence_tensor passes per-country means).
+    Missing or non-numeric values are 0, as every chart plots them.
+    ``country_index``, ``supplier_index`` and ``metric_index`` map labels
+    to positions.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        first = df.loc[~df["Country"].duplicated()]
+        self.countries = first["Country"].tolist()
+        self.suppliers = list(TENSOR_SUPPLIERS)
+        self.metrics = list(TENSOR_METRICS)
+        self.country_index = {c: i for i, c in enumerate(self.countries)}
+        self.supplier_index = {s: i for i, s in enumerate(self.suppliers)}
+        self.metric_index = {m: i for i, m in enumerate(self.metrics)}
+
+        # Last row for unknown countries, see _country_rows
+        values = np.zeros((len(self.countries) + 1, len(self.suppliers), len(self.metrics)))
+        for s, supplier in enumerate(self.suppliers):
+            for m, metric in enumerate(self.metrics):
+                column = f"{metric}_{supplier}_numeric"
+                if column in first.columns:
+                    values[:-1, s, m] = pd.to_numeric(first[column], errors="coerce").fillna(0).to_numpy()
+        values.flags.writeable = False
+        self._values = values
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[:-1]
+
+    def matrix(self, metric: str, countries=None) -> np.ndarray:
+        """(countries, suppliers) slice of one metric.
+
+        Args:
+            metric: "Influence" or "Matrix"
+            countries: Country labels for the rows, in order; unknown
+                countries get a row of zeros. Defaults to every country.
+        """
+        m = self.metric_index[metric]
+        if countries is None:
+            return self.values[:, :, m]
+        return self._values[_country_rows(self.country_index, countries), :, m]
+
+
+def get_influence_tensor() -> InfluenceTensor:
+    """InfluenceTensor of per-country means, rebuilt when the data version changes.
+
+    The means come from country_means, so with a SQLite source they are
+    aggregated in the database.
+    """
+    return _derived("influence_tensor",
+                    lambda _: InfluenceTensor(country_means(TENSOR_COLUMNS).reset_index()),
+                    wants=lambda c: False,
+                    depends=lambda c: c == "Country" or c in TENSOR_COLUMNS)
+
+
+# ============================================================================
+# TIME DIMENSION AND ROLLUP CUBE
+# ============================================================================
+
+# Column holding each row's year; data without it is a single snapshot
+YEAR_COLUMN = "Year"
+SNAPSHOT_YEAR = 2025
+
+# Country and supplier groupings the cube pre-aggregates. Countries in no
+# region bloc are grouped under OTHER_REGION.
+REGION_BLOCS = {
+    "Central Asia": ["Kazakhstan", "Uzbekistan", "Turkmenistan"],
+    "South Caucasus": ["Azerbaijan", "Georgia"],
+}
+OTHER_REGION = "Other"
+SUPPLIER_BLOCS = {
+    "Western": ["US", "Turkiye_Israel"],
+    "Eastern": ["Russia", "China"],
+}
+
+FACT_COLUMNS = ["Country", "Supplier", "Year", "Metric", "Value", "Rows"]
+
+
+def _build_fact_table(sums: pd.DataFrame, counts: pd.DataFrame) -> pd.DataFrame:
+    """Long fact table from country_year_sums of the *_numeric columns."""
+    # Categoricals with shared categories, so the parts concatenate as codes
+    countries = pd.Categorical(sums.index.get_level_values(0).astype(object))
+    years = sums.index.get_level_values(1).to_numpy(dtype=np.int32)
+    parts = []
+    for s, supplier in enumerate(TENSOR_SUPPLIERS):
+        for m, metric in enumerate(TENSOR_METRICS):
+            column = f"{metric}_{supplier}_numeric"
+            if column not in sums.columns:
+                continue
+            rows = counts[column].to_numpy(dtype=np.int64)
+            keep = rows > 0
+            n = int(keep.sum())
+            parts.append(pd.DataFrame({
+                "Country": countries[keep],
+                "Supplier": pd.Categorical.from_codes(np.full(n, s), TENSOR_SUPPLIERS),
+                "Year": years[keep],
+                "Metric": pd.Categorical.from_codes(np.full(n, m), TENSOR_METRICS),
+                "Value": sums[column].to_numpy(dtype=float)[keep] / rows[keep],
+                "Rows": rows[keep],
+            }))
+    if not parts:
+        return pd.DataFrame({c: [] for c in FACT_COLUMNS})
+    return pd.concat(parts, ignore_index=True)
+
+
+def get_fact_table() -> pd.DataFrame:
+    """Time-indexed fact table, rebuilt when the data version changes.
+
+    One row per country, supplier, year and metric ("Influence" or
+    "Matrix") that has data: ``Value`` is the mean of the metric's
+    *_numeric column over the ``Rows`` dataset rows for that country and
+    year. Like get_data, each call returns a new frame over shared columns.
+    """
+    facts = _derived("fact_table", lambda _: _build_fact_table(*country_year_sums(TENSOR_COLUMNS)),
+                     wants=lambda c: False,
+                     depends=lambda c: c in ("Country", YEAR_COLUMN) or c in TENSOR_COLUMNS)
+    return facts.copy(deep=not _COPY_ON_WRITE)
+
+
+class RollupCube:
+    """Year-range rollups of the fact table as O(1) array lookups.
+
+    Metric sums and row counts are held as prefix sums along a contiguous
+    year axis, for each pairing of countries or REGION_BLOCS with suppliers
+    or SUPPLIER_BLOCS. The total over years
+    ``first..last`` is then ``prefix[last + 1] - prefix[first]``, whatever
+    the range, instead of a groupby over the raw rows.
+    """
+
+    def __init__(self, facts: pd.DataFrame):
+        self.countries = facts["Country"].unique().tolist()
+        self.suppliers = list(TENSOR_SUPPLIERS)
+        self.metrics = list(TENSOR_METRICS)
+        self.regions = list(REGION_BLOCS) + [OTHER_REGION]
+        self.blocs = list(SUPPLIER_BLOCS)
+        if len(facts):
+            self.years = np.arange(facts["Year"].min(), facts["Year"].max() + 1)
+        else:
+            self.years = np.array([SNAPSHOT_YEAR])
+        self.country_index = {c: i for i, c in enumerate(self.countries)}
+        self.supplier_index = {s: i for i, s in enumerate(self.suppliers)}
+        self.metric_index = {m: i for i, m in enumerate(self.metrics)}
+
+        # (country, supplier, year, metric) totals; the last country row is
+        # for unknown countries, see _country_rows
+        shape = (len(self.countries) + 1, len(self.suppliers), len(self.years), len(self.metrics))
+        cells = np.ravel_multi_index((
+            facts["Country"].map(self.country_index).to_numpy(dtype=np.intp),
+            facts["Supplier"].map(self.supplier_index).to_numpy(dtype=np.intp),
+            facts["Year"].to_numpy(dtype=np.intp) - self.years[0],
+            facts["Metric"].map(self.metric_index).to_numpy(dtype=np.intp)), shape)
+        rows = facts["Rows"].to_numpy(dtype=float)
+        size = int(np.prod(shape))
+        sums = np.bincount(cells, facts["Value"].to_numpy(dtype=float) * rows, size).reshape(shape)
+        counts = np.bincount(cells, rows, size).reshape(shape)
+
+        region_of = {c: r for r, members in REGION_BLOCS.items() for c in members}
+        regions = np.zeros((len(self.regions), len(self.countries) + 1))
+        for i, country in enumerate(self.countries):
+            regions[self.regions.index(region_of.get(country, OTHER_REGION)), i] = 1
+        blocs = np.array([[s in SUPPLIER_BLOCS[b] for s in self.suppliers] for b in self.blocs], dtype=float)
+
+        self._prefix = {}
+        for by in ("country", "region"):
+            for grouping in ("supplier", "bloc"):
+                totals = []
+                for array in (sums, counts):
+                    if by == "region":
+                        array = np.einsum("gc,csym->gsym", regions, array)
+                    if grouping == "bloc":
+                        array = np.einsum("bs,csym->cbym", blocs, array)
+                    prefix = np.zeros(array.shape[:2] + (len(self.years) + 1,) + array.shape[3:])
+                    np.cumsum(array, axis=2, out=prefix[:, :, 1:])
+                    prefix.flags.writeable = False
+                    totals.append(prefix)
+                self._prefix[by, grouping] = tuple(totals)
+
+    def _span(self, years):
+        """Prefix positions bounding the inclusive (first, last) year range."""
+        if years is None:
+            return 0, len(self.years)
+        first = int(np.clip(years[0] - self.years[0], 0, len(self.years)))
+        last = int(np.clip(years[1] - self.years[0] + 1, 0, len(self.years)))
+        return first, max(first, last)
+
+    def totals(self, metric: str, years=None, by: str = "country", suppliers: str = "supplier"):
+        """(sums, row counts) of one metric over a year range.
+
+        Args:
+            metric: "Influence" or "Matrix"
+            years: Inclusive (first, last) years; every year when None
+            by: "country" or "region" rows (the country level has an
+                extra all-zero last row)
+            suppliers: "supplier" or "bloc" columns
+        """
+        sums, counts = self._prefix[by, suppliers]
+        first, last = self._span(years)
+        m = self.metric_index[metric]
+        return sums[:, :, last, m] - sums[:, :, first, m], counts[:, :, last, m] - counts[:, :, first, m]
+
+    def rollup(self, metric: str, years=None, by: str = "country", suppliers: str = "supplier",
+               stat: str = "mean") -> pd.DataFrame:
+        """One metric over a year range, countries or regions by suppliers or blocs.
+
+        Args:
+            metric, years, by, suppliers: As for totals
+            stat: "mean" over the rows in range (NaN where there are none)
+                or "sum"
+        """
+        sums, counts = self.totals(metric, years, by, suppliers)
+        if by == "country":
+            sums, counts = sums[:-1], counts[:-1]
+        if stat == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                sums = np.where(counts > 0, sums / counts, np.nan)
+        index = pd.Index(self.countries if by == "country" else self.regions, name=by.title())
+        return pd.DataFrame(sums, index=index, columns=self.suppliers if suppliers == "supplier" else self.blocs)
+
+    def matrix(self, metric: str, countries=None, years=None) -> np.ndarray:
+        """(countries, suppliers) means over a year range, as InfluenceTensor.matrix.
+
+        Countries or cells without data in range are 0. Over every year this
+        equals get_influence_tensor().matrix(metric, countries).
+        """
+        sums, counts = self.totals(metric, years)
+        if countries is not None:
+            rows = _country_rows(self.country_index, countries)
+            sums, counts = sums[rows], counts[rows]
+        else:
+            sums, counts = sums[:-1], counts[:-1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, 0.0)
+
+
+def get_rollup_cube() -> RollupCube:
+    """RollupCube over get_fact_table(), rebuilt when the data version changes."""
+    return _derived("rollup_cube", lambda _: RollupCube(get_fact_table()),
+                    wants=lambda c: False,
+                    depends=lambda c: c in ("Country", YEAR_COLUMN) or c in TENSOR_COLUMNS)
+
+
+# ============================================================================
+# DEFENSE SYSTEMS CATALOG
+# ============================================================================
+
+class SystemsCatalog:
+    """The Systems_* columns parsed once into interned system ids.
+
+    ``systems`` lists each distinct system name once (``system_index`` maps
+    back). ``incidence`` is a sparse (country * supplier, system) 0/1
+    matrix, row ``c * len(suppliers) + s``, and ``counts[c, s]`` is the
+    number of systems supplier ``s`` fields in country ``c`` (first row
+    per country, as in InfluenceTensor). ``row_counts[r, s]`` counts the
+    entries listed in row ``r`` of the dataset as written, for charts that
+    draw every row: a "None" entry counts, empty and "N/A" cells are 0.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        first = df.loc[~df["Country"].duplicated()]
+        self.countries = first["Country"].tolist()
+        self.suppliers = [c[len(SYSTEMS_PREFIX):] for c in df.columns if c.startswith(SYSTEMS_PREFIX)]
+        self.country_index = {c: i for i, c in enumerate(self.countries)}
+        self.supplier_index = {s: i for i, s in enumerate(self.suppliers)}
+        self.system_index = {}
+
+        n_suppliers = len(self.suppliers)
+        cells = first[[SYSTEMS_PREFIX + s for s in self.suppliers]].to_numpy()
+        rows, cols = [], []
+        for cell, text in enumerate(cells.ravel()):
+            for name in _split_entries(text):
+                rows.append(cell)
+                cols.append(self.system_index.setdefault(name, len(self.system_index)))
+        self.systems = list(self.system_index)
+
+        # Duplicate listings within a cell sum, so clamp back to 0/1
+        incidence = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(self.countries) * n_suppliers, len(self.systems)),
+        )
+        incidence.data[:] = 1
+        self.incidence = incidence
+        self._by_system = incidence.tocsc()
+
+        # Last row for unknown countries, see _country_rows
+        counts = np.zeros((len(self.countries) + 1, n_suppliers), dtype=np.int64)
+        counts[:-1] = np.asarray(incidence.sum(axis=1)).reshape(len(self.countries), n_suppliers)
+        counts.flags.writeable = False
+        self._counts = counts
+
+        listed = {}
+        row_cells = df[[SYSTEMS_PREFIX + s for s in self.suppliers]].to_numpy().ravel()
+        for text in row_cells:
+            if text not in listed:
+                listed[text] = _listed_entries(text)
+        row_counts = np.fromiter((listed[text] for text in row_cells), dtype=np.int32, count=len(row_cells))
+        row_counts = row_counts.reshape(len(df), n_suppliers)
+        row_counts.flags.writeable = False
+        self.row_counts = row_counts
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts[:-1]
+
+    def count_matrix(self, countries=None, suppliers=None) -> np.ndarray:
+        """(countries, suppliers) system counts.
+
+        Args:
+            countries: Country labels for the rows; unknown countries count
+                0. Defaults to every country.
+            suppliers: Supplier names for the columns. Defaults to all.
+        """
+        counts = self.counts if countries is None else \
+            self._counts[_country_rows(self.country_index, countries)]
+        if suppliers is not None:
+            counts = counts[:, [self.supplier_index[s] for s in suppliers]]
+        return counts
+
+    def systems_for(self, country: str, supplier: str) -> list:
+        """System names ``supplier`` fields in ``country``, in catalog order."""
+        if country not in self.country_index:
+            return []
+        row = self.country_index[country] * len(self.suppliers) + self.supplier_index[supplier]
+        start, stop = self.incidence.indptr[row], self.incidence.indptr[row + 1]
+        return [self.systems[i] for i in self.incidence.indices[start:stop]]
+
+    def countries_fielding(self, system: str, supplier: str = None) -> list:
+        """Countries that field ``system``, optionally only from ``supplier``."""
+        if system not in self.system_index:
+            return []
+        column = self.system_index[system]
+        start, stop = self._by_system.indptr[column], self._by_system.indptr[column + 1]
+        cells = self._by_system.indices[start:stop]
+        if supplier is not None:
+            cells = cells[cells % len(self.suppliers) == self.supplier_index[supplier]]
+        return [self.countries[i] for i in np.unique(cells // len(self.suppliers))]
+
+
+def get_systems_catalog() -> SystemsCatalog:
+    """SystemsCatalog over the cached dataset, rebuilt when its version changes."""
+    return _derived("systems_catalog", SystemsCatalog,
+                    wants=lambda c: c == "Country" or c.startswith(SYSTEMS_PREFIX))
 
 
 # Mock logger for compatibility
@@ -120,7 +120,7 @@ def generate_all_charts():
             
             # Generate the figure
             if chart_def["id"] == "threat-perception-analysis":
-                fig = chart_def["function"]()
+                fig = chart_def["function"](inline_flags=True)
             elif chart_def["id"] == "chart1-supplier-influence":
                 fig = chart_def["function"]("Influence", True)
             elif chart_def["id"] == "chart3-defense-systems":
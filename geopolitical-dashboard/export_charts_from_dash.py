@@ -21,7 +21,7 @@ def main():
     print()
     
     charts = [
-        ("Chart 0: Threat Perception", create_threat_density_map, "threat-perception-analysis", {}),
+        ("Chart 0: Threat Perception", create_threat_density_map, "threat-perception-analysis", {"inline_flags": True}),
         ("Chart 1: Supplier Influence", create_3d_surface_figure, "chart1-supplier-influence", {"influence_type": "Influence", "show_all_countries": True}),
         ("Chart 3: Defense Systems", create_3d_scatter_figure, "chart3-defense-systems", {"supplier_filter": "all"}),
         ("Chart 4: Multi-Country Radar", create_radar_figure, "chart4-multi-country-radar", {"selected_countries": None, "metric_type": "influence"}),
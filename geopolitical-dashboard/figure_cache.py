@@ -0,0 +1,542 @@
+"""
+Memoized figures for the page create_*_figure builders.
+
+Every builder is a pure function of its arguments and the dataset, so
+decorating it with ``memoize_figure`` gives it a ``cached`` variant that
+returns the finished figure as a plain dict, built at most once per
+argument combination and data version. Figures are kept as serialized JSON
+in one process-wide LRU bounded by bytes rather than entries, since a map
+over thousands of countries is far larger than a five-country radar.
+
+With FIGURE_CACHE_URL set, figures one process misses are also looked up
+in (and written, zlib-compressed, to) a store shared by every worker and
+host: a directory or a Redis server. Builds are single-flight: of the
+threads and workers missing the same figure at once, one builds it while
+the others wait for its result.
+
+Pages register every combination their controls offer with
+``register_warmup``; ``start_warmup`` builds them all in the background at
+startup, so first clicks are cache hits, and ``warmup_status`` reports
+when that is done.
+"""
+
+import functools
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+import chart_data
+
+try:
+    import redis
+except ImportError:  # Only needed for redis:// stores
+    redis = None
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Total size of the cached figure JSON in one process
+FIGURE_CACHE_BYTES = int(os.environ.get("FIGURE_CACHE_BYTES", str(64 * 2**20)))
+
+# Store shared between processes: "redis://host:port/db", "file:///path" or
+# a directory path; empty keeps figures per process
+FIGURE_CACHE_URL = os.environ.get("FIGURE_CACHE_URL", "")
+
+FIGURE_COMPRESS_LEVEL = 6
+# Seconds figures live in a shared store (they are keyed by content, so this
+# only bounds space), and the most a directory store keeps
+FIGURE_STORE_TTL = 7 * 24 * 3600
+FIGURE_STORE_BYTES = 2**30
+# Seconds between sweeps of a directory store for figures past those limits
+FIGURE_STORE_SWEEP_INTERVAL = 600
+# Part of every shared key; raise it when figures built by the same code
+# should no longer be served (e.g. the stored format changed)
+FIGURE_CACHE_VERSION = 1
+# Seconds one process may hold a figure's build lock before others give up
+# waiting and build it themselves, and how often they check meanwhile
+FIGURE_LOCK_TIMEOUT = 30.0
+FIGURE_LOCK_POLL = 0.05
+
+# Threads building the registered figures at startup; 0 disables the warm-up
+FIGURE_WARMUP_THREADS = int(os.environ.get("FIGURE_WARMUP_THREADS", "4"))
+
+
+# ============================================================================
+# BYTE-BUDGETED LRU
+# ============================================================================
+
+class FigureCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+    max_bytes: int
+
+
+class FigureCache:
+    """LRU of figure JSON strings, evicting once they exceed ``max_bytes``.
+
+    Sizes are the strings' in-memory sizes. A figure larger than the whole
+    budget is returned to its caller but not kept.
+    """
+
+    def __init__(self, max_bytes: int = FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._hits = self._misses = self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, count: bool = True):
+        """Return the cached JSON for ``key`` or None, counting the lookup."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += count
+                return None
+            self._entries.move_to_end(key)
+            self._hits += count
+            return value
+
+    def put(self, key, value: str) -> None:
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= sys.getsizeof(old)
+            self._entries[key] = value
+            self._nbytes += size
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= sys.getsizeof(evicted)
+                self._evictions += 1
+
+    def info(self) -> FigureCacheInfo:
+        with self._lock:
+            return FigureCacheInfo(self._hits, self._misses, self._evictions, len(self._entries),
+                                   self._nbytes, self.max_bytes)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self._hits = self._misses = self._evictions = 0
+
+
+FIGURE_CACHE = FigureCache()
+
+
+# ============================================================================
+# SHARED STORES
+# ============================================================================
+
+class FileFigureStore:
+    """Compressed figures as files in a directory shared by the processes.
+
+    Writes go through a temporary file and ``os.replace``, so readers never
+    see half a figure. Build locks are files created exclusively; one older
+    than FIGURE_LOCK_TIMEOUT is taken to belong to a dead process. Every
+    FIGURE_STORE_SWEEP_INTERVAL a write also sweeps out figures older than
+    ``ttl``, then the oldest ones until the rest fit in ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, ttl: int = FIGURE_STORE_TTL, max_bytes: int = FIGURE_STORE_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._next_sweep = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, suffix: str = ".fig") -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), "rb") as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def set(self, key: str, value: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(value)
+        os.replace(tmp, self._path(key))
+        if time.monotonic() >= self._next_sweep:
+            self._next_sweep = time.monotonic() + FIGURE_STORE_SWEEP_INTERVAL
+            self.sweep()
+
+    def sweep(self) -> int:
+        """Delete expired figures, then the oldest over budget; returns how many."""
+        figures = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".fig"):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                figures.append((st.st_mtime, st.st_size, entry.path))
+        figures.sort()
+        expired = time.time() - self.ttl
+        total = sum(size for _, size, _ in figures)
+        removed = 0
+        for mtime, size, path in figures:
+            if mtime >= expired and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def lock(self, key: str, timeout: float):
+        """Take ``key``'s build lock; returns a token, or None if it is held."""
+        path = self._path(key, ".lock")
+        token = uuid.uuid4().hex
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) < timeout:
+                        return None
+                    os.remove(path)  # Stale: retry once
+                except OSError:
+                    pass
+                continue
+            with os.fdopen(fd, "w") as fh:
+                fh.write(token)
+            return token
+        return None
+
+    def unlock(self, key: str, token: str) -> None:
+        path = self._path(key, ".lock")
+        try:
+            with open(path) as fh:
+                if fh.read() == token:
+                    os.remove(path)
+        except OSError:
+            pass
+
+
+# Compare-and-delete in one step, so a lock that expired and was retaken
+# by another builder is never dropped
+_REDIS_UNLOCK_SCRIPT = 'if redis.call("get",KEYS[1])==ARGV[1] then return redis.call("del",KEYS[1]) end'
+
+
+class RedisFigureStore:
+    """Compressed figures in Redis, or any server speaking its protocol.
+
+    Needs redis-py. Build locks are SET NX keys that expire after
+    FIGURE_LOCK_TIMEOUT, so a crashed builder never blocks the others for
+    longer than that; they are released by a Lua script that deletes them
+    only while they still hold the builder's token.
+    """
+
+    def __init__(self, url: str, ttl: int = FIGURE_STORE_TTL):
+        if redis is None:
+            raise ImportError("redis:// figure caches need redis-py (pip install redis)")
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url, socket_timeout=5)
+        self._unlock = self._client.register_script(_REDIS_UNLOCK_SCRIPT)
+
+    def get(self, key: str):
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self._client.set(key, value, ex=self.ttl)
+
+    def lock(self, key: str, timeout: float):
+        token = uuid.uuid4().hex
+        if self._client.set(f"{key}:lock", token, nx=True, px=int(timeout * 1000)):
+            return token
+        return None
+
+    def unlock(self, key: str, token: str) -> None:
+        self._unlock(keys=[f"{key}:lock"], args=[token])
+
+
+def figure_store(url: str):
+    """Shared store for a FIGURE_CACHE_URL, or None for an empty URL."""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme in ("redis", "rediss", "unix"):
+        return RedisFigureStore(url)
+    if parsed.scheme == "file":
+        return FileFigureStore(parsed.path)
+    if parsed.scheme:
+        raise ValueError(f"Unsupported figure cache URL {url!r}")
+    return FileFigureStore(url)
+
+
+try:
+    SHARED_STORE = figure_store(FIGURE_CACHE_URL)
+except (ImportError, ValueError, OSError) as e:
+    print(f"❌ Could not open figure cache {FIGURE_CACHE_URL}: {e}; caching per process only")
+    SHARED_STORE = None
+
+
+def _code_version(build) -> str:
+    """Digest of the source file ``build`` is defined in, so a deploy that
+    changes a page stops serving figures its old code built."""
+    try:
+        with open(inspect.getsourcefile(build), "rb") as fh:
+            return hashlib.sha256(fh.read()).hexdigest()
+    except (OSError, TypeError):
+        return hashlib.sha256(build.__code__.co_code).hexdigest()
+
+
+def _shared_key(name: str, code: str, digest: str, arguments) -> str:
+    payload = json.dumps([FIGURE_CACHE_VERSION, name, code, digest, arguments], separators=(",", ":"),
+                         default=repr)
+    return "figure:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _store_call(call, *args):
+    """``call(*args)``, logging a store error instead of raising it."""
+    try:
+        call(*args)
+    except Exception as e:
+        print(f"❌ Shared figure cache unavailable: {e}")
+
+
+def _fetch_or_build(shared, key: str, build_json) -> str:
+    """Figure JSON from ``shared``, building and storing it at most once.
+
+    Whoever takes the key's lock builds; everyone else polls for the result
+    until the lock is released or FIGURE_LOCK_TIMEOUT passes, then builds
+    it themselves. Store errors fall back to building locally; errors from
+    the builder are raised after its one attempt.
+    """
+    deadline = time.monotonic() + FIGURE_LOCK_TIMEOUT
+    while True:
+        try:
+            data = shared.get(key)
+            if data is not None:
+                return zlib.decompress(data).decode("utf-8")
+            token = shared.lock(key, FIGURE_LOCK_TIMEOUT)
+        except Exception as e:
+            print(f"❌ Shared figure cache unavailable: {e}")
+            return build_json()
+        if token is not None:
+            try:
+                fig_json = build_json()
+                _store_call(shared.set, key, zlib.compress(fig_json.encode("utf-8"), FIGURE_COMPRESS_LEVEL))
+                return fig_json
+            finally:
+                _store_call(shared.unlock, key, token)
+        if time.monotonic() > deadline:
+            return build_json()
+        time.sleep(FIGURE_LOCK_POLL)
+
+
+# Threads of one process that miss the same figure wait on the same lock
+# (striped, so the table stays fixed-size)
+_BUILD_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+# ============================================================================
+# DECORATOR
+# ============================================================================
+
+def _normalize(value):
+    """Hashable, canonical form of an argument value.
+
+    Lists and tuples become tuples (order kept: it decides trace order),
+    sets sorted tuples, dicts sorted item tuples and NumPy scalars Python
+    scalars, so equal arguments give equal keys however they were passed.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_normalize(v) for v in value))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def memoize_figure(columns=None, cache: FigureCache = None, shared=None):
+    """Add a memoized ``cached`` variant to a figure builder.
+
+    ``builder.cached(*args, **kwargs)`` returns ``builder(...)`` as a plain
+    figure dict (which Dash accepts as a figure), served from ``cache``
+    (default FIGURE_CACHE) when the same arguments were built against the
+    same data. Defaults are filled in before keying, so
+    ``f.cached()`` and ``f.cached(<defaults>)`` share an entry. Calling the
+    builder itself is unchanged and returns a fresh go.Figure.
+
+    Args:
+        columns: Dataset columns the figure is drawn from; the key then uses
+            chart_data.columns_version(columns), so edits to other columns
+            keep the entry. Defaults to the whole dataset's version.
+        cache: FigureCache to use
+        shared: Store shared between processes, consulted on a miss
+            (FileFigureStore or RedisFigureStore); defaults to
+            SHARED_STORE, False for none
+    """
+    def decorator(build):
+        signature = inspect.signature(build)
+        name = f"{build.__module__}.{build.__qualname__}"
+        code = _code_version(build)
+
+        def _build(bound, arguments) -> str:
+            build_json = lambda: build(*bound.args, **bound.kwargs).to_json()
+            store = SHARED_STORE if shared is None else shared
+            if not store:
+                return build_json()
+            # Versions count reloads per process; other processes match on content
+            digest = chart_data.columns_digest(columns or chart_data.get_data().columns)
+            return _fetch_or_build(store, _shared_key(name, code, digest, arguments), build_json)
+
+        @functools.wraps(build)
+        def cached(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            version = chart_data.data_version() if columns is None else chart_data.columns_version(columns)
+            arguments = _normalize(bound.arguments)
+            key = (name, version, arguments)
+
+            store = cache or FIGURE_CACHE
+            fig_json = store.get(key)
+            if fig_json is None:
+                with _BUILD_LOCKS[hash(key) % len(_BUILD_LOCKS)]:
+                    fig_json = store.get(key, count=False)
+                    if fig_json is None:
+                        fig_json = _build(bound, arguments)
+                        store.put(key, fig_json)
+            # A fresh dict per call, so callers may modify it
+            return json.loads(fig_json)
+
+        build.cached = cached
+        return build
+
+    return decorator
+
+
+def cache_info() -> FigureCacheInfo:
+    """Hit/miss/eviction counters and size of FIGURE_CACHE."""
+    return FIGURE_CACHE.info()
+
+
+# ============================================================================
+# STARTUP WARM-UP
+# ============================================================================
+
+class WarmupStatus(NamedTuple):
+    total: int
+    done: int
+    failed: int
+    seconds: float
+    ready: bool
+
+
+_warmups = []  # (cached builder, keyword arguments) per figure to build
+
+
+def register_warmup(cached, **options):
+    """Have the warm-up call ``cached`` with every combination of ``options``.
+
+    Each keyword maps one of the builder's arguments to every value its
+    control offers, e.g.
+    ``register_warmup(create_figure.cached, metric=["spending", "threat"])``
+    queues two calls.
+    """
+    for values in itertools.product(*options.values()):
+        _warmups.append((cached, dict(zip(options, values))))
+
+
+class FigureWarmup:
+    """Background thread building every registered figure once.
+
+    Calls are spread over a thread pool; a call that raises is counted as
+    failed and the rest carry on. The warm-up is ready once every call has
+    returned.
+    """
+
+    def __init__(self, threads: int = FIGURE_WARMUP_THREADS):
+        self.threads = threads
+        self._calls = list(_warmups)
+        self._done = self._failed = 0
+        self._started = self._finished = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="figure-warmup", daemon=True)
+
+    def _call(self, cached, kwargs):
+        try:
+            cached(**kwargs)
+        except Exception as e:
+            print(f"❌ Could not warm {cached.__qualname__}({kwargs}): {e}")
+            with self._lock:
+                self._failed += 1
+        else:
+            with self._lock:
+                self._done += 1
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="figure-warmup") as pool:
+            for cached, kwargs in self._calls:
+                pool.submit(self._call, cached, kwargs)
+        self._finished = time.monotonic()
+        status = self.status()
+        print(f"✅ Warmed {status.done} of {status.total} figures in {status.seconds:.1f}s")
+
+    def start(self):
+        self._started = time.monotonic()
+        self._thread.start()
+        return self
+
+    def status(self) -> WarmupStatus:
+        with self._lock:
+            done, failed = self._done, self._failed
+        end = self._finished or time.monotonic()
+        seconds = end - self._started if self._started is not None else 0.0
+        return WarmupStatus(len(self._calls), done, failed, seconds, self._finished is not None)
+
+
+_warmup = None
+
+
+def start_warmup(threads: int = None):
+    """Start this process's FigureWarmup, once.
+
+    Does nothing when the thread count is 0.
+
+    Returns:
+        The running FigureWarmup, or None
+    """
+    global _warmup
+    threads = FIGURE_WARMUP_THREADS if threads is None else threads
+    if _warmup is None and threads > 0:
+        _warmup = FigureWarmup(threads).start()
+    return _warmup
+
+
+def warmup_status() -> WarmupStatus:
+    """Progress of the startup warm-up; ready at once if none was started."""
+    if _warmup is None:
+        return WarmupStatus(0, 0, 0, 0.0, True)
+    return _warmup.status()
@@ -0,0 +1,778 @@
+"""
+Circular flag images for the threat perception map.
+
+Flags are downloaded from flagcdn.com, cropped to a square, clipped to a
+circle and encoded as image data URLs, at only as many pixels as they cover
+on screen (see ``flag_spec``). Finished data URLs are cached in two
+tiers - an in-process LRU and a content-addressed directory on disk - so
+only the first render on a host pays for the download and the PIL work.
+Batches of flags are fetched concurrently over a pooled keep-alive session
+under a single deadline (see ``get_circular_flags``), behind a circuit
+breaker that skips the network entirely while the CDN is unreachable.
+"""
+
+import base64
+import functools
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from io import BytesIO
+from typing import NamedTuple
+
+import numpy as np
+import requests
+import requests.adapters
+from PIL import Image
+
+# ============================================================================
+# FLAG URLS AND CONFIGURATION
+# ============================================================================
+
+FLAG_URLS = {
+    "Kazakhstan":    "https://flagcdn.com/256x192/kz.png",
+    "Uzbekistan":    "https://flagcdn.com/256x192/uz.png",
+    "Turkmenistan":  "https://flagcdn.com/256x192/tm.png",
+    "Azerbaijan":    "https://flagcdn.com/256x192/az.png",
+    "Georgia":       "https://flagcdn.com/256x192/ge.png",
+}
+
+# Mask geometry for the original 512px rendering: the circle is 142.5% and
+# the flag 165% of the nominal size, on a canvas padded by 20px.
+CIRCLE_SCALE = 0.95 * 1.5
+FLAG_FIT_SCALE = 1.10 * 1.5
+CANVAS_PADDING = 20
+
+# The same geometry as fractions of the canvas, so any canvas size renders
+# the same picture. These are part of the cache key.
+_REFERENCE_CANVAS = int(512 * CIRCLE_SCALE) + CANVAS_PADDING
+CIRCLE_FRACTION = int(512 * CIRCLE_SCALE) / _REFERENCE_CANVAS
+FLAG_FIT_FRACTION = int(512 * FLAG_FIT_SCALE) / _REFERENCE_CANVAS
+
+# Display-size-aware rendering: canvases are sized for the on-screen flag
+# times the device-pixel ratio, rounded up to a bucket.
+FLAG_DEVICE_PIXEL_RATIO = 2.0
+FLAG_PX_BUCKET = 16
+FLAG_MIN_CANVAS_PX = 16
+FLAG_PALETTE_COLORS = 64
+FLAG_FORMATS = {"png": "image/png", "png8": "image/png", "webp": "image/webp"}
+# File extension of prebuilt flag assets in each format
+FLAG_ASSET_EXTENSIONS = {"png": "png", "png8": "png", "webp": "webp"}
+FLAG_SPRITE_TILE_PX = 384
+FLAG_SPRITE_CACHE_SIZE = 4
+
+FLAG_CACHE_DIR = os.environ.get(
+    "FLAG_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".flag_cache"),
+)
+FLAG_CACHE_MAXSIZE = 128
+# Disk budget of the flag cache directory; every FLAG_CACHE_SWEEP_INTERVAL
+# seconds a write deletes the oldest entries until the rest fit
+FLAG_CACHE_MAX_BYTES = int(os.environ.get("FLAG_CACHE_MAX_BYTES", str(256 * 2**20)))
+FLAG_CACHE_SWEEP_INTERVAL = 600
+
+# Flags are fetched concurrently over one keep-alive session. Whatever is not
+# ready when the overall deadline expires is drawn as a placeholder disc; the
+# fetch keeps running in the background and lands in the cache for next time.
+FLAG_FETCH_WORKERS = 8
+FLAG_FETCH_TIMEOUT = 5
+FLAG_FETCH_DEADLINE = float(os.environ.get("FLAG_FETCH_DEADLINE", "3.0"))
+PLACEHOLDER_FILL = "#9e9e9e"
+
+# Prebuilt flags written by build_flag_assets.py. Dash serves the assets/
+# folder at /assets/, so the figure can reference flags by URL instead of
+# inlining them as base64.
+FLAG_ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "flags")
+FLAG_ASSETS_URL_PREFIX = "/assets/flags/"
+FLAG_MANIFEST_NAME = "manifest.json"
+FLAG_ASSET_DISPLAY_PX = 256
+
+
+# ============================================================================
+# TWO-TIER CACHE
+# ============================================================================
+
+class FlagCache:
+    """In-process LRU backed by a content-addressed directory on disk.
+
+    Keys are tuples of JSON-serialisable values; each key is hashed to a
+    SHA-256 digest that names its file in ``directory``. Disk writes go
+    through a temporary file and ``os.replace`` so concurrent workers never
+    read a half-written entry. Every FLAG_CACHE_SWEEP_INTERVAL a write also
+    deletes the oldest entries until the directory fits in ``max_bytes``.
+    """
+
+    def __init__(self, directory=FLAG_CACHE_DIR, maxsize=FLAG_CACHE_MAXSIZE,
+                 max_bytes=FLAG_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    @staticmethod
+    def digest(key) -> str:
+        """Return the content address for a cache key."""
+        payload = json.dumps(key, separators=(",", ":"), sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.txt")
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None."""
+        digest = self.digest(key)
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return self._memory[digest]
+
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(digest), "r", encoding="ascii") as fh:
+                value = fh.read()
+        except OSError:
+            return None
+
+        self._remember(digest, value)
+        return value
+
+    def put(self, key, value: str) -> None:
+        """Store ``value`` in memory and, if configured, on disk."""
+        digest = self.digest(key)
+        self._remember(digest, value)
+
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="ascii") as fh:
+                fh.write(value)
+            os.replace(tmp_path, self._path(digest))
+        except OSError as e:
+            print(f"Could not write flag cache entry {digest}: {e}")
+            return
+        if time.monotonic() >= self._next_sweep:
+            self._next_sweep = time.monotonic() + FLAG_CACHE_SWEEP_INTERVAL
+            self.sweep()
+
+    def sweep(self) -> int:
+        """Delete the oldest disk entries over ``max_bytes``; returns how many."""
+        entries = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".txt"):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            return 0
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop the in-memory tier and optionally the on-disk tier."""
+        with self._lock:
+            self._memory.clear()
+        if disk and self.directory and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".txt"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def _remember(self, digest: str, value: str) -> None:
+        with self._lock:
+            self._memory[digest] = value
+            self._memory.move_to_end(digest)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+
+_flag_cache = FlagCache()
+
+
+class FlagSpec(NamedTuple):
+    """Pixel size and encoding of one rendered flag."""
+    canvas_px: int
+    fmt: str
+
+
+
+# ============================================================================
+# CIRCUIT BREAKER
+# ============================================================================
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of a network call while the flag CDN breaker is open."""
+
+
+class CircuitBreaker:
+    """Process-wide circuit breaker with exponential backoff.
+
+    ``closed``: calls go through; consecutive failures are counted.
+    ``open``: calls are refused until the backoff expires.
+    ``half_open``: a single trial call is let through; success closes the
+    breaker, failure re-opens it with twice the previous backoff.
+    """
+
+    def __init__(self, failure_threshold=3, base_backoff=5.0, max_backoff=300.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.backoff = base_backoff
+        self.open_until = 0.0
+        self._trial_in_flight = False
+
+    def is_open(self) -> bool:
+        """True while calls would be refused without a half-open trial."""
+        with self._lock:
+            if self.state == "open":
+                return self._clock() < self.open_until
+            return self.state == "half_open" and self._trial_in_flight
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed now."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if self._clock() < self.open_until:
+                    return False
+                self.state = "half_open"
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self.backoff = self.base_backoff
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self.state == "open":
+                return  # A call from before it opened; already counted as down
+            if self.state == "half_open":
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+                self._open()
+                return
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self.state = "open"
+        self.open_until = self._clock() + self.backoff
+        self._trial_in_flight = False
+        print(f"Flag CDN unreachable, skipping flag downloads for {self.backoff:g}s")
+
+
+FLAG_CDN_BREAKER = CircuitBreaker()
+
+_session = None
+_session_lock = threading.Lock()
+_executor = None
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+
+def flag_spec(size: int = 512, display_px: float = None, dpr: float = None, fmt: str = "png") -> FlagSpec:
+    """Resolve rendering arguments to the canvas size and encoding to produce.
+
+    With ``display_px`` the canvas is sized for the pixels the flag actually
+    covers on screen (times the device-pixel ratio), rounded up to a
+    FLAG_PX_BUCKET multiple so slightly different sizes share cache entries.
+    Without it, ``size`` keeps its original meaning (a 512 request yields
+    the ~750px canvas the map has always used).
+    """
+    if fmt not in FLAG_FORMATS:
+        raise ValueError(f"Unknown flag format {fmt!r}, expected one of {sorted(FLAG_FORMATS)}")
+    if display_px is None:
+        circle_diameter = int(size * CIRCLE_SCALE)
+        return FlagSpec(max(size, circle_diameter + CANVAS_PADDING), fmt)
+
+    dpr = FLAG_DEVICE_PIXEL_RATIO if dpr is None else dpr
+    canvas_px = math.ceil(max(display_px * dpr, FLAG_MIN_CANVAS_PX) / FLAG_PX_BUCKET) * FLAG_PX_BUCKET
+    return FlagSpec(canvas_px, fmt)
+
+
+def _flag_cache_key(flag_url: str, spec: FlagSpec) -> tuple:
+    return (flag_url, spec.canvas_px, spec.fmt, CIRCLE_FRACTION, FLAG_FIT_FRACTION, FLAG_PALETTE_COLORS)
+
+
+def _http_session() -> requests.Session:
+    """Return the process-wide keep-alive session used for flag downloads."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=FLAG_FETCH_WORKERS, pool_maxsize=FLAG_FETCH_WORKERS
+            )
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def download_flag(flag_url: str) -> bytes:
+    """Download the raw flag image through the pooled session.
+
+    Connection errors, timeouts, 5xx responses and any other error raised
+    while requesting trip FLAG_CDN_BREAKER; while it is open this raises
+    CircuitOpenError without touching the network.
+    """
+    if not FLAG_CDN_BREAKER.allow():
+        raise CircuitOpenError(f"flag CDN circuit open, not fetching {flag_url}")
+    try:
+        response = _http_session().get(flag_url, timeout=FLAG_FETCH_TIMEOUT)
+    except BaseException:
+        # Whatever went wrong, settle the breaker so a half-open trial is
+        # never left in flight
+        FLAG_CDN_BREAKER.record_failure()
+        raise
+    if response.status_code >= 500:
+        FLAG_CDN_BREAKER.record_failure()
+    else:
+        # Any other answer, 4xx included, shows the CDN is reachable
+        FLAG_CDN_BREAKER.record_success()
+    response.raise_for_status()
+    return response.content
+
+
+def _flag_source(flag_url: str) -> bytes:
+    """Return the raw flag image, downloading it only once per host.
+
+    Sources are kept in the flag cache next to the renderings, so any new
+    size or format can be rendered without the network.
+    """
+    key = ("source", flag_url)
+    cached = _flag_cache.get(key)
+    if cached is not None:
+        return base64.b64decode(cached)
+    content = download_flag(flag_url)
+    _flag_cache.put(key, base64.b64encode(content).decode())
+    return content
+
+
+@functools.lru_cache(maxsize=32)
+def _circular_mask(canvas_px: int) -> Image.Image:
+    """Hard-edged circular alpha mask, built once per canvas size with NumPy."""
+    diameter = canvas_px * CIRCLE_FRACTION
+    center = (canvas_px - 1) / 2
+    yy, xx = np.ogrid[:canvas_px, :canvas_px]
+    inside = (xx - center) ** 2 + (yy - center) ** 2 <= (diameter / 2) ** 2
+    return Image.fromarray(np.where(inside, 255, 0).astype(np.uint8), mode="L")
+
+
+def render_circular_flag_image(flag_url: str, spec: FlagSpec) -> Image.Image:
+    """Download a flag and clip it to a circle on a ``spec.canvas_px`` canvas.
+
+    Raises on network or decoding errors; see ``get_circular_flag`` for the
+    cached, fault-tolerant entry point.
+    """
+    img = Image.open(BytesIO(_flag_source(flag_url)))
+
+    # Convert to RGBA if needed
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+
+    # Crop flag to square (1:1 ratio) by taking the center square
+    # This removes the black space that appears when fitting rectangular flag in circle
+    min_dim = min(img.width, img.height)
+    left = (img.width - min_dim) // 2
+    top = (img.height - min_dim) // 2
+    img = img.crop((left, top, left + min_dim, top + min_dim))
+
+    # Scale the square flag slightly past the canvas so it fills the circle
+    canvas_px = spec.canvas_px
+    flag_fit_size = max(1, int(round(canvas_px * FLAG_FIT_FRACTION)))
+    img = img.resize((flag_fit_size, flag_fit_size), Image.Resampling.LANCZOS)
+
+    # Create output image with the flag centered
+    output = Image.new('RGBA', (canvas_px, canvas_px), (0, 0, 0, 0))
+    offset = (canvas_px - flag_fit_size) // 2
+    output.paste(img, (offset, offset), img)
+
+    # Apply the cached mask as the alpha channel to clip the flag to the circle
+    output.putalpha(_circular_mask(canvas_px))
+    return output
+
+
+def encode_flag_image(img: Image.Image, fmt: str = "png") -> bytes:
+    """Encode a rendered flag as ``png``, paletted ``png8`` or ``webp``."""
+    buffered = BytesIO()
+    if fmt == "png8":
+        img = img.quantize(colors=FLAG_PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+        img.save(buffered, format="PNG", optimize=True)
+    elif fmt == "webp":
+        img.save(buffered, format="WEBP", quality=80, method=4)
+    else:
+        img.save(buffered, format="PNG", optimize=False)
+    return buffered.getvalue()
+
+
+def render_circular_flag_bytes(flag_url: str, spec: FlagSpec) -> bytes:
+    """Render a flag and return the encoded image bytes."""
+    return encode_flag_image(render_circular_flag_image(flag_url, spec), spec.fmt)
+
+
+def render_circular_flag(flag_url: str, size: int = 512, **spec_kwargs) -> str:
+    """Download a flag and render it as a circular image data URL."""
+    spec = flag_spec(size, **spec_kwargs)
+    img_str = base64.b64encode(render_circular_flag_bytes(flag_url, spec)).decode()
+    return f"data:{FLAG_FORMATS[spec.fmt]};base64,{img_str}"
+
+
+def get_circular_flag(flag_url: str, size: int = 512, display_px: float = None,
+                      dpr: float = None, fmt: str = "png") -> str:
+    """Return a circular flag data URL, rendering it only on a cache miss.
+
+    Args:
+        flag_url: URL to the flag image
+        size: Size of the output circular image (default 512x512 for high quality)
+        display_px: On-screen width of the flag in CSS pixels; when given,
+            only ``display_px * dpr`` pixels are rendered and ``size`` is ignored
+        dpr: Device-pixel ratio to render for (default FLAG_DEVICE_PIXEL_RATIO)
+        fmt: ``png``, paletted ``png8`` or ``webp``
+
+    Returns:
+        Base64 encoded data URL for the circular flag image, or a placeholder
+        disc if the flag could not be downloaded or rendered. Failures are
+        not cached, so the next render retries.
+    """
+    spec = flag_spec(size, display_px=display_px, dpr=dpr, fmt=fmt)
+    key = _flag_cache_key(flag_url, spec)
+    cached = _flag_cache.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        data_url = _render_and_cache(flag_url, spec)
+    except CircuitOpenError:
+        return placeholder_flag(spec)
+    except Exception as e:
+        print(f"Error creating circular flag for {flag_url}: {e}")
+        return placeholder_flag(spec)
+    return data_url
+
+
+def placeholder_flag(spec=512) -> str:
+    """Return a plain disc with the same geometry as a circular flag.
+
+    ``spec`` is a FlagSpec or a legacy ``size``. Drawn as an SVG data URL,
+    so it costs no network and no PIL work.
+    """
+    if not isinstance(spec, FlagSpec):
+        spec = flag_spec(spec)
+    canvas_px = spec.canvas_px
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{canvas_px}" height="{canvas_px}" '
+        f'viewBox="0 0 {canvas_px} {canvas_px}">'
+        f'<circle cx="{canvas_px / 2}" cy="{canvas_px / 2}" r="{canvas_px * CIRCLE_FRACTION / 2}" '
+        f'fill="{PLACEHOLDER_FILL}"/></svg>'
+    )
+    return "data:image/svg+xml;base64," + base64.b64encode(svg.encode("utf-8")).decode()
+
+
+def is_placeholder_flag(image_url: str) -> bool:
+    """True if ``image_url`` is a placeholder disc rather than a real flag."""
+    return image_url.startswith("data:image/svg+xml")
+
+
+def _render_and_cache(flag_url: str, spec: FlagSpec) -> str:
+    img_str = base64.b64encode(render_circular_flag_bytes(flag_url, spec)).decode()
+    data_url = f"data:{FLAG_FORMATS[spec.fmt]};base64,{img_str}"
+    _flag_cache.put(_flag_cache_key(flag_url, spec), data_url)
+    return data_url
+
+
+def _submit_fetch(flag_url: str, spec: FlagSpec):
+    """Start (or join) a background render of one flag."""
+    global _executor
+    digest = FlagCache.digest(_flag_cache_key(flag_url, spec))
+    with _inflight_lock:
+        future = _inflight.get(digest)
+        if future is not None:
+            return future
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FLAG_FETCH_WORKERS, thread_name_prefix="flag-fetch")
+        future = _executor.submit(_render_and_cache, flag_url, spec)
+        _inflight[digest] = future
+
+    def _done(_future, digest=digest):
+        with _inflight_lock:
+            _inflight.pop(digest, None)
+
+    future.add_done_callback(_done)
+    return future
+
+
+def get_circular_flags(flag_urls: dict, size: int = 512, deadline: float = None,
+                       display_px: dict = None, dpr: float = None, fmt: str = "png",
+                       fetch: bool = True) -> dict:
+    """Return circular flag data URLs for many flags at once.
+
+    Cache misses are downloaded and rendered concurrently. Any flag that is
+    not ready within ``deadline`` seconds overall, or that fails, is returned
+    as a placeholder disc. While FLAG_CDN_BREAKER is open, misses skip the
+    network and become placeholders immediately.
+
+    Args:
+        flag_urls: Mapping of key (e.g. country name) to flag URL
+        size: Size of the output circular images
+        deadline: Overall time budget in seconds (default FLAG_FETCH_DEADLINE)
+        display_px: Optional mapping of key to on-screen width in CSS pixels
+        dpr: Device-pixel ratio to render for (default FLAG_DEVICE_PIXEL_RATIO)
+        fmt: ``png``, paletted ``png8`` or ``webp``
+        fetch: When False, flags whose source is not already cached become
+            placeholders without any request
+
+    Returns:
+        Mapping of the same keys to image URLs
+    """
+    display_px = display_px or {}
+    specs = {key: flag_spec(size, display_px=display_px.get(key), dpr=dpr, fmt=fmt) for key in flag_urls}
+    results = _fetch_flags(flag_urls, specs, deadline, fetch)
+    return {key: url if url is not None else placeholder_flag(specs[key]) for key, url in results.items()}
+
+
+def _fetch_flags(flag_urls: dict, specs: dict, deadline: float = None, fetch: bool = True) -> dict:
+    """Cached or concurrently rendered flag data URLs, None where unavailable.
+
+    The shared part of get_circular_flags and the sprite atlas: misses go
+    through the fetch pool under one overall ``deadline`` (default
+    FLAG_FETCH_DEADLINE) and are skipped while FLAG_CDN_BREAKER is open, or
+    always when ``fetch`` is False, unless their source is already cached.
+    """
+    deadline = FLAG_FETCH_DEADLINE if deadline is None else deadline
+    results = {}
+    pending = {}
+    for key, flag_url in flag_urls.items():
+        spec = specs[key]
+        cached = _flag_cache.get(_flag_cache_key(flag_url, spec))
+        if cached is not None:
+            results[key] = cached
+        elif (not fetch or FLAG_CDN_BREAKER.is_open()) and _flag_cache.get(("source", flag_url)) is None:
+            results[key] = None
+        else:
+            pending[key] = _submit_fetch(flag_url, spec)
+
+    if pending:
+        wait(pending.values(), timeout=deadline)
+
+    for key, future in pending.items():
+        if future.done() and future.exception() is None:
+            results[key] = future.result()
+            continue
+        if future.done() and isinstance(future.exception(), CircuitOpenError):
+            pass
+        elif future.done():
+            print(f"Error creating circular flag for {flag_urls[key]}: {future.exception()}")
+        else:
+            print(f"Flag for {flag_urls[key]} not ready within {deadline:.1f}s, using placeholder")
+        results[key] = None
+
+    return results
+
+
+# ============================================================================
+# SPRITE ATLAS
+# ============================================================================
+
+class FlagSpriteSheet(NamedTuple):
+    """All circular flags packed into one RGBA image.
+
+    ``tiles`` maps each key to the (left, top) corner of its
+    ``tile_px`` x ``tile_px`` cell in ``image``. ``complete`` is False if
+    any tile is a placeholder.
+    """
+    image: Image.Image
+    tiles: dict
+    tile_px: int
+    complete: bool
+
+
+_sprite_sheets = OrderedDict()
+_sprite_sheets_lock = threading.Lock()
+
+
+def _placeholder_tile(tile_px: int) -> Image.Image:
+    """The placeholder disc as a PIL tile, for flags that failed to load."""
+    tile = Image.new("RGBA", (tile_px, tile_px), PLACEHOLDER_FILL)
+    tile.putalpha(_circular_mask(tile_px))
+    return tile
+
+
+def _build_sprite_sheet(flag_items: tuple, tile_px: int, fetch: bool = True) -> FlagSpriteSheet:
+    spec = FlagSpec(tile_px, "png")
+    columns = max(1, math.ceil(math.sqrt(len(flag_items))))
+    rows = max(1, math.ceil(len(flag_items) / columns))
+    image = Image.new("RGBA", (columns * tile_px, rows * tile_px), (0, 0, 0, 0))
+
+    # Tiles come through the same pool and deadline as get_circular_flags
+    flag_urls = dict(flag_items)
+    rendered = _fetch_flags(flag_urls, {key: spec for key in flag_urls}, fetch=fetch)
+
+    tiles = {}
+    complete = True
+    for i, (key, _) in enumerate(flag_items):
+        data_url = rendered[key]
+        if data_url is None:
+            tile = _placeholder_tile(tile_px)
+            complete = False
+        else:
+            tile = Image.open(BytesIO(base64.b64decode(data_url.split(",", 1)[1]))).convert("RGBA")
+        corner = ((i % columns) * tile_px, (i // columns) * tile_px)
+        image.paste(tile, corner)
+        tiles[key] = corner
+
+    return FlagSpriteSheet(image, tiles, tile_px, complete)
+
+
+def get_flag_sprite_sheet(flag_urls: dict, tile_px: int = FLAG_SPRITE_TILE_PX,
+                          fetch: bool = True) -> FlagSpriteSheet:
+    """Return the sprite sheet for ``flag_urls``, building it once per process.
+
+    Tiles are fetched and rendered concurrently under FLAG_FETCH_DEADLINE,
+    as in get_circular_flags (including its ``fetch`` switch), and cached
+    like its flags. Sheets with placeholder tiles are not kept, so a later
+    call retries the flags.
+    """
+    tile_px = min(math.ceil(tile_px / FLAG_PX_BUCKET) * FLAG_PX_BUCKET, FLAG_SPRITE_TILE_PX)
+    key = (tuple(sorted(flag_urls.items())), tile_px)
+    with _sprite_sheets_lock:
+        if key in _sprite_sheets:
+            _sprite_sheets.move_to_end(key)
+            return _sprite_sheets[key]
+
+    sheet = _build_sprite_sheet(*key, fetch=fetch)
+    if sheet.complete:
+        with _sprite_sheets_lock:
+            _sprite_sheets[key] = sheet
+            while len(_sprite_sheets) > FLAG_SPRITE_CACHE_SIZE:
+                _sprite_sheets.popitem(last=False)
+    return sheet
+
+
+def compose_flag_overlay(sheet: FlagSpriteSheet, placements, width_px: int, height_px: int,
+                         fmt: str = "png8") -> str:
+    """Draw flags from a sprite sheet onto one transparent overlay image.
+
+    Plotly layout images cannot crop a region of their source, so instead of
+    one ``layout.images`` entry per country the atlas mode composites every
+    flag into a single overlay that covers the plot area. The payload then
+    depends on the plot size, not on the number of countries.
+
+    Args:
+        sheet: Sprite sheet holding every flag that may be placed
+        placements: Iterable of (key, center_x, center_y, diameter) in
+            overlay pixels, with y measured from the top
+        width_px: Overlay width in pixels
+        height_px: Overlay height in pixels
+        fmt: ``png``, paletted ``png8`` or ``webp``
+
+    Returns:
+        Data URL for the overlay image
+    """
+    overlay = Image.new("RGBA", (width_px, height_px), (0, 0, 0, 0))
+    for key, cx, cy, diameter in placements:
+        if key not in sheet.tiles:
+            continue
+        left, top = sheet.tiles[key]
+        size = max(1, int(round(diameter)))
+        tile = sheet.image.crop((left, top, left + sheet.tile_px, top + sheet.tile_px))
+        if size != sheet.tile_px:
+            tile = tile.resize((size, size), Image.Resampling.LANCZOS)
+        # alpha_composite rejects negative offsets; clip flags at the edges
+        x0 = int(round(cx - size / 2))
+        y0 = int(round(cy - size / 2))
+        overlay.alpha_composite(tile, (max(x0, 0), max(y0, 0)), (max(-x0, 0), max(-y0, 0)))
+
+    img_str = base64.b64encode(encode_flag_image(overlay, fmt)).decode()
+    return f"data:{FLAG_FORMATS[fmt]};base64,{img_str}"
+
+
+# ============================================================================
+# PREBUILT STATIC ASSETS
+# ============================================================================
+
+def flag_asset_filename(country: str, image_bytes: bytes, fmt: str = "png") -> str:
+    """Return the content-hashed filename for a rendered flag."""
+    slug = country.lower().replace(" ", "-")
+    ext = FLAG_ASSET_EXTENSIONS.get(fmt, "png")
+    return f"{slug}.{hashlib.sha256(image_bytes).hexdigest()[:12]}.{ext}"
+
+
+def build_flag_assets(flag_urls=None, display_px: float = FLAG_ASSET_DISPLAY_PX, dpr: float = None,
+                      fmt: str = "png8", directory: str = FLAG_ASSETS_DIR) -> dict:
+    """Render every flag into ``directory`` and write its manifest.
+
+    Flags are rendered once at the largest size the map displays them.
+    Files are named after a hash of their contents, so they can be served
+    with long-lived cache headers. Stale renderings from earlier builds are
+    removed. Returns the manifest, mapping country to asset URL.
+    """
+    flag_urls = FLAG_URLS if flag_urls is None else flag_urls
+    spec = flag_spec(display_px=display_px, dpr=dpr, fmt=fmt)
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {}
+    for country, url in flag_urls.items():
+        image_bytes = render_circular_flag_bytes(url, spec)
+        filename = flag_asset_filename(country, image_bytes, fmt)
+        with open(os.path.join(directory, filename), "wb") as fh:
+            fh.write(image_bytes)
+        manifest[country] = FLAG_ASSETS_URL_PREFIX + filename
+
+    keep = {url.rsplit("/", 1)[-1] for url in manifest.values()}
+    for name in os.listdir(directory):
+        if name.endswith((".png", ".webp")) and name not in keep:
+            os.remove(os.path.join(directory, name))
+
+    manifest_path = os.path.join(directory, FLAG_MANIFEST_NAME)
+    with open(manifest_path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+
+    load_flag_manifest.cache_clear()
+    return manifest
+
+
+@functools.lru_cache(maxsize=None)
+def load_flag_manifest(directory: str = FLAG_ASSETS_DIR) -> dict:
+    """Return the country -> asset URL manifest, or {} if none was built."""
+    try:
+        with open(os.path.join(directory, FLAG_MANIFEST_NAME), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
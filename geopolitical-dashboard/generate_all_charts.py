@@ -135,6 +135,10 @@ def create_chart7():
     fig.update_layout(title="Supplier Connections", height=700)
     return fig
 
+def create_chart0():
+    """Threat Perception (flags inlined so the HTML file is self-contained)"""
+    return create_threat_density_map(inline_flags=True)
+
 def main():
     print("=" * 70)
     print("GENERATING ALL CHARTS AS HTML")
@@ -142,7 +146,7 @@ def main():
     print()
     
     charts = [
-        ("Chart 0: Threat Perception", create_threat_density_map, "threat-perception-analysis"),
+        ("Chart 0: Threat Perception", create_chart0, "threat-perception-analysis"),
         ("Chart 1: Supplier Influence Surface", create_chart1, "chart1-supplier-influence"),
         ("Chart 2: Regional Influence Map", create_chart2, "chart2-regional-influence"),
         ("Chart 3: Defense Systems Analysis", create_chart3, "chart3-defense-systems"),
@@ -17,26 +17,70 @@ from dash import Dash, dcc, html
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-from PIL import Image, ImageDraw
-import requests
-from io import BytesIO
-import base64
+import json
 import os
+import threading
+from collections import OrderedDict
+from scipy.spatial import cKDTree
+
+import chart_data
+
+from flags import (
+    FLAG_ASSET_DISPLAY_PX,
+    FLAG_DEVICE_PIXEL_RATIO,
+    FLAG_URLS,
+    compose_flag_overlay,
+    get_circular_flag,
+    get_circular_flags,
+    get_flag_sprite_sheet,
+    is_placeholder_flag,
+    load_flag_manifest,
+)
 
 # ============================================================================
-# FLAG URLS AND CONFIGURATION
+# CONFIGURATION
 # ============================================================================
 
-FLAG_URLS = {
-    "Kazakhstan":    "https://flagcdn.com/256x192/kz.png",
-    "Uzbekistan":    "https://flagcdn.com/256x192/uz.png",
-    "Turkmenistan":  "https://flagcdn.com/256x192/tm.png",
-    "Azerbaijan":    "https://flagcdn.com/256x192/az.png",
-    "Georgia":       "https://flagcdn.com/256x192/ge.png",
-}
-
 SPEND_COL_CANDIDATES = ["Avg_Spend", "Weapons_Spend", "Spend"]
 
+# Figure is 1000x600px with 80px/50px side and 100px/80px top/bottom margins
+PLOT_AREA_WIDTH_PX = 1000 - 80 - 50
+PLOT_AREA_HEIGHT_PX = 600 - 100 - 80
+
+# Flag centers closer than this on screen are pushed apart
+OVERLAP_MIN_DISTANCE_PX = 60.0
+OVERLAP_TOLERANCE_PX = 0.5  # Sub-pixel overlaps are invisible, stop pushing
+
+# Jitter applied to each country's samples for the density background
+JITTER_SAMPLES_PER_COUNTRY = 10
+JITTER_DISTANCE_SD = 0.5          # degrees
+JITTER_SPEND_FRACTION = 0.05      # of the country's spending
+
+# Density background grid. "histogram" lets plotly.js bin every jittered
+# sample in the browser; "heatmap" bins them here and ships only the grid.
+DENSITY_NBINSX = 10
+DENSITY_NBINSY = 7
+DENSITY_MODES = ("histogram", "heatmap")
+DENSITY_BINS_CACHE_SIZE = 16
+
+_density_bins_cache = OrderedDict()
+_density_bins_lock = threading.Lock()
+
+# The map is deterministic for a given seed, so finished figures can be
+# memoized per data version (see get_threat_density_figure)
+THREAT_MAP_SEED = 42
+THREAT_MAP_CACHE_SIZE = 16
+
+# Dataset columns the map is drawn from; cached maps and density grids are
+# keyed on their version only
+THREAT_MAP_COLUMNS = ["Country", "Avg_Spend", "Threat Perception"]
+
+_threat_map_cache = OrderedDict()
+_threat_map_lock = threading.Lock()
+
+# Paletted PNG keeps inline flags small; see flags.FLAG_FORMATS for options
+FLAG_IMAGE_FORMAT = "png8"
+
 # ============================================================================
 # DATA GENERATION
 # ============================================================================
@@ -52,19 +96,9 @@ def get_data():
 
     These countries face various regional threats and security challenges.
     """
-    data = {
-        "Country": [
-            "Kazakhstan", "Uzbekistan", "Turkmenistan", "Azerbaijan", "Georgia"
-        ],
-        "Avg_Spend": [
-            120_000_000, 90_000_000, 45_000_000, 70_000_000, 30_000_000
-        ],
-        "Threat Perception": [
-            "Regional Instability", "Regional Instability", "Border Security",
-            "Energy Competition", "Russian Influence"
-        ]
-    }
-    return pd.DataFrame(data)
+    # Same rows as the dashboard dataset, so both share one cached copy and
+    # one version token
+    return chart_data.query_data(columns=THREAT_MAP_COLUMNS)
 
 
 def _compute_avg_spend(df: pd.DataFrame) -> pd.DataFrame:
@@ -102,6 +136,9 @@ def _degrees_to_km(degrees: float) -> float:
 def _create_circular_flag(flag_url: str, size: int = 512) -> str:
     """Create a circular flag image with clean sharp edges.
 
+    Renderings are cached in memory and on disk (see ``flags.FlagCache``),
+    so only the first call per (URL, size) downloads and resizes the flag.
+
     Args:
         flag_url: URL to the flag image
         size: Size of the output circular image (default 512x512 for high quality)
@@ -109,121 +146,219 @@ def _create_circular_flag(flag_url: str, size: int = 512) -> str:
     Returns:
         Base64 encoded data URL for the circular flag image
     """
-    try:
-        # Download the flag image
-        response = requests.get(flag_url, timeout=5)
-        response.raise_for_status()
-        img = Image.open(BytesIO(response.content))
-
-        # Convert to RGBA if needed
-        if img.mode != 'RGBA':
-            img = img.convert('RGBA')
-
-        # Circle size: make it 95% of output size, increased by 50% = 142.5%
-        # This makes the circle larger while maintaining proportions
-        circle_diameter = int(size * 0.95 * 1.5)
-
-        # Increase canvas size to fit the larger circle
-        # Canvas needs to be at least as large as the circle diameter
-        canvas_size = max(size, circle_diameter + 20)  # Add 20px padding
-
-        # Crop flag to square (1:1 ratio) by taking the center square
-        # This removes the black space that appears when fitting rectangular flag in circle
-        min_dim = min(img.width, img.height)
-        left = (img.width - min_dim) // 2
-        top = (img.height - min_dim) // 2
-        img = img.crop((left, top, left + min_dim, top + min_dim))
-
-        # Now scale the square flag to fill the circle
-        # Use 110% of output size, increased by 50% = 165%
-        flag_fit_size = int(size * 1.10 * 1.5)
-        img = img.resize((flag_fit_size, flag_fit_size), Image.Resampling.LANCZOS)
-
-        # Create output image with the flag centered
-        output = Image.new('RGBA', (canvas_size, canvas_size), (0, 0, 0, 0))
-        # Center the flag in the output
-        offset_x = (canvas_size - img.width) // 2
-        offset_y = (canvas_size - img.height) // 2
-        output.paste(img, (offset_x, offset_y), img)
-
-        # Create a hard-edged circular mask
-        # Start with transparent background (0)
-        mask = Image.new('L', (canvas_size, canvas_size), 0)
-        mask_draw = ImageDraw.Draw(mask)
-        # Draw opaque circle - centered in the larger canvas
-        circle_offset = (canvas_size - circle_diameter) // 2
-        mask_draw.ellipse([circle_offset, circle_offset, circle_offset + circle_diameter, circle_offset + circle_diameter], fill=255)
-
-        # Apply the mask ON TOP of the flag (as alpha channel)
-        # This clips the flag to the circular shape
-        output.putalpha(mask)
-
-        # Convert to base64 data URL
-        buffered = BytesIO()
-        output.save(buffered, format="PNG", optimize=False)
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        return f"data:image/png;base64,{img_str}"
-
-    except Exception as e:
-        print(f"Error creating circular flag for {flag_url}: {e}")
-        return flag_url  # Fallback to original URL
+    return get_circular_flag(flag_url, size=size)
 
 
 # ============================================================================
 # VISUALIZATION CREATION
 # ============================================================================
 
-def _detect_and_resolve_overlaps(summary: pd.DataFrame, min_distance: float = 3.0) -> pd.DataFrame:
+def _detect_and_resolve_overlaps(summary: pd.DataFrame, min_distance: float = 60.0,
+                                 max_iterations: int = 100) -> pd.DataFrame:
     """
     Detect and resolve overlapping flag positions.
 
+    Positions are compared in screen space: Distance and Avg_Spend are each
+    scaled by their range onto the plot area, so ``min_distance`` is in
+    pixels regardless of the units on each axis. Close pairs are found with
+    a KD-tree and all pushes of a pass are applied at once with NumPy.
+
     Args:
         summary: DataFrame with Distance and Avg_Spend columns
-        min_distance: Minimum distance between flags in data units
+        min_distance: Minimum distance between flag centers in plot pixels
+        max_iterations: Upper bound on push passes
 
     Returns:
         DataFrame with adjusted positions to prevent overlaps
     """
     summary = summary.copy()
-    positions = summary[["Distance", "Avg_Spend"]].values
+    positions = summary[["Distance", "Avg_Spend"]].to_numpy(dtype=float)
+    if len(positions) < 2:
+        return summary
+
+    # Map data units to plot pixels
+    origin = positions.min(axis=0)
+    span = np.ptp(positions, axis=0)
+    span[span == 0] = 1.0
+    scale = np.array([PLOT_AREA_WIDTH_PX, PLOT_AREA_HEIGHT_PX]) / span
+    points = (positions - origin) * scale
 
-    # Iteratively adjust positions to prevent overlaps
-    max_iterations = 100
     for _ in range(max_iterations):
-        adjusted = False
-
-        for i in range(len(positions)):
-            for j in range(i + 1, len(positions)):
-                # Calculate distance between two flags
-                dx = positions[i, 0] - positions[j, 0]
-                dy = positions[i, 1] - positions[j, 1]
-                dist = np.sqrt(dx**2 + dy**2)
-
-                # If too close, push them apart
-                if dist < min_distance and dist > 0:
-                    adjusted = True
-                    # Calculate push direction
-                    push_x = (dx / dist) * (min_distance - dist) / 2
-                    push_y = (dy / dist) * (min_distance - dist) / 2
-
-                    # Apply push (but keep within reasonable bounds)
-                    positions[i, 0] += push_x
-                    positions[j, 0] -= push_x
-                    positions[i, 1] += push_y
-                    positions[j, 1] -= push_y
-
-        if not adjusted:
+        pairs = cKDTree(points).query_pairs(min_distance - OVERLAP_TOLERANCE_PX, output_type="ndarray")
+        if len(pairs) == 0:
             break
 
+        i, j = pairs[:, 0], pairs[:, 1]
+        delta = points[i] - points[j]
+        dist = np.hypot(delta[:, 0], delta[:, 1])
+        overlap = min_distance - dist
+
+        # Coincident flags have no direction to push in; split them sideways
+        coincident = dist == 0
+        delta[coincident] = (1.0, 0.0)
+        dist[coincident] = 1.0
+
+        # Push each pair apart by half the overlap along the line between them
+        push = delta * (overlap / (2 * dist))[:, None]
+        n = len(points)
+        for axis in (0, 1):
+            points[:, axis] += (np.bincount(i, push[:, axis], minlength=n)
+                                - np.bincount(j, push[:, axis], minlength=n))
+
     # Update summary with adjusted positions
+    positions = points / scale + origin
     summary["Distance"] = positions[:, 0]
     summary["Avg_Spend"] = positions[:, 1]
 
     return summary
 
 
-def create_threat_density_map():
-    """Create geopolitical threat perception density map."""
+def _country_distances(df: pd.DataFrame, country_positions: dict, ref_lat: float, ref_lon: float) -> pd.DataFrame:
+    """Distance of each known country from the regional reference point.
+
+    Returns one row per country with Country, Distance, Avg_Spend and
+    Threat_Perception; countries without a position are dropped.
+    """
+    known = df[df["Country"].isin(list(country_positions))]
+    # As objects: a Categorical maps every category, including ones without
+    # a position that no row uses
+    countries = known["Country"].astype(object)
+    lat = countries.map(lambda c: country_positions[c]["lat"]).to_numpy(dtype=float)
+    lon = countries.map(lambda c: country_positions[c]["lon"]).to_numpy(dtype=float)
+    return pd.DataFrame({
+        "Country": known["Country"].to_numpy(),
+        "Distance": np.sqrt((lat - ref_lat)**2 + (lon - ref_lon)**2),
+        "Avg_Spend": known["Avg_Spend"].to_numpy(dtype=float),
+        "Threat_Perception": known["Threat Perception"].to_numpy(),
+    })
+
+
+def _expand_samples(base: pd.DataFrame, samples_per_country: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Repeat each country ``samples_per_country`` times with random jitter.
+
+    Distance gets N(0, 0.5) degrees and spending N(0, 5%) noise, drawn in a
+    single batch from ``rng``.
+    """
+    n = len(base) * samples_per_country
+    noise = rng.standard_normal((n, 2))
+    distance = np.repeat(base["Distance"].to_numpy(), samples_per_country)
+    spend = np.repeat(base["Avg_Spend"].to_numpy(), samples_per_country)
+    return pd.DataFrame({
+        "Country": np.repeat(base["Country"].to_numpy(), samples_per_country),
+        "Distance": distance + JITTER_DISTANCE_SD * noise[:, 0],
+        "Avg_Spend": spend + spend * JITTER_SPEND_FRACTION * noise[:, 1],
+        "Threat_Perception": np.repeat(base["Threat_Perception"].to_numpy(), samples_per_country),
+    })
+
+
+def _density_bins(draw_samples, cache_key=None,
+                  nbinsx: int = DENSITY_NBINSX, nbinsy: int = DENSITY_NBINSY):
+    """Bin the jittered samples into an ``nbinsx`` x ``nbinsy`` count grid.
+
+    Args:
+        draw_samples: Returns the jittered samples (Distance and Avg_Spend
+            columns); only called when the grid is not cached
+        cache_key: Identifies the samples (data version, seed, sample count);
+            when given, the grid is kept in a bounded LRU under it
+
+    Returns:
+        (x bin centers, y bin centers, counts indexed [y, x])
+    """
+    if cache_key is not None:
+        cache_key = (cache_key, nbinsx, nbinsy)
+        with _density_bins_lock:
+            bins = _density_bins_cache.get(cache_key)
+            if bins is not None:
+                _density_bins_cache.move_to_end(cache_key)
+                return bins
+
+    df_proc = draw_samples()
+    counts, x_edges, y_edges = np.histogram2d(
+        df_proc["Distance"].to_numpy(dtype=float),
+        df_proc["Avg_Spend"].to_numpy(dtype=float),
+        bins=(nbinsx, nbinsy),
+    )
+    bins = ((x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2, counts.T)
+
+    if cache_key is not None:
+        with _density_bins_lock:
+            _density_bins_cache[cache_key] = bins
+            while len(_density_bins_cache) > DENSITY_BINS_CACHE_SIZE:
+                _density_bins_cache.popitem(last=False)
+    return bins
+
+
+def _flag_atlas_overlay(flag_boxes, background_extent, dpr: float = FLAG_DEVICE_PIXEL_RATIO,
+                        fetch_flags: bool = True):
+    """Composite all flags into one overlay image covering the plot area.
+
+    Args:
+        flag_boxes: List of (country, x, y, width, height) in data units
+        background_extent: (x min, x max, y min, y max) of the density
+            background, so the axis ranges also cover it
+        dpr: Device-pixel ratio to render the overlay for
+        fetch_flags: Passed to get_flag_sprite_sheet as ``fetch``
+
+    Returns:
+        (layout image dict, x-axis range, y-axis range, whether every flag
+        loaded)
+    """
+    xs = [b[1] - b[3] / 2 for b in flag_boxes] + [b[1] + b[3] / 2 for b in flag_boxes] + list(background_extent[:2])
+    ys = [b[2] - b[4] / 2 for b in flag_boxes] + [b[2] + b[4] / 2 for b in flag_boxes] + list(background_extent[2:])
+    x_pad = (max(xs) - min(xs)) * 0.05
+    y_pad = (max(ys) - min(ys)) * 0.05
+    x_range = [min(xs) - x_pad, max(xs) + x_pad]
+    y_range = [min(ys) - y_pad, max(ys) + y_pad]
+    x_span = x_range[1] - x_range[0]
+    y_span = y_range[1] - y_range[0]
+
+    width_px = int(PLOT_AREA_WIDTH_PX * dpr)
+    height_px = int(PLOT_AREA_HEIGHT_PX * dpr)
+
+    # Like layout images with the default "contain" sizing, each flag fits
+    # inside its (width, height) box
+    placements = []
+    for country, x, y, w, h in flag_boxes:
+        diameter = min(w / x_span * width_px, h / y_span * height_px)
+        cx = (x - x_range[0]) / x_span * width_px
+        cy = (y_range[1] - y) / y_span * height_px
+        placements.append((country, cx, cy, diameter))
+
+    sheet = get_flag_sprite_sheet(
+        {c: FLAG_URLS[c] for c, *_ in flag_boxes},
+        tile_px=max(p[3] for p in placements),
+        fetch=fetch_flags,
+    )
+    source = compose_flag_overlay(sheet, placements, width_px, height_px, fmt=FLAG_IMAGE_FORMAT)
+
+    overlay = dict(
+        source=source,
+        x=x_range[0],
+        y=y_range[1],
+        xref="x",
+        yref="y",
+        xanchor="left",
+        yanchor="top",
+        sizex=x_span,
+        sizey=y_span,
+        sizing="stretch",
+        opacity=1.0,
+        layer="above"
+    )
+    return overlay, x_range, y_range, sheet.complete
+
+
+def _build_threat_density_map(inline_flags: bool, flag_mode: str, samples_per_country: int,
+                              analytic_summary: bool, seed, density_mode: str = "histogram",
+                              fetch_flags: bool = True):
+    """Build the threat map; returns (figure, whether every flag loaded)."""
+    if flag_mode not in ("images", "atlas"):
+        raise ValueError(f"Unknown flag_mode {flag_mode!r}, expected 'images' or 'atlas'")
+    if density_mode not in DENSITY_MODES:
+        raise ValueError(f"Unknown density_mode {density_mode!r}, expected one of {DENSITY_MODES}")
+    if samples_per_country < 1:
+        # Countries are placed at the mean of their samples
+        raise ValueError(f"samples_per_country must be at least 1, got {samples_per_country}")
 
     # Load data
     df = get_data()
@@ -242,26 +377,15 @@ def create_threat_density_map():
     ref_lat, ref_lon = 42.0, 55.0
 
     # Process data
-    rows = []
-    for _, row in df.iterrows():
-        c = row["Country"]
-        if c not in country_positions:
-            continue
-
-        pos = country_positions[c]
-        dist = np.sqrt((pos["lat"] - ref_lat)**2 + (pos["lon"] - ref_lon)**2)
-        threat_text = row["Threat Perception"]
-        avg_spend = row["Avg_Spend"]
-
-        for _ in range(10):
-            rows.append({
-                "Country": c,
-                "Distance": dist + np.random.normal(0, 0.5),
-                "Avg_Spend": avg_spend + np.random.normal(0, avg_spend * 0.05),
-                "Threat_Perception": threat_text,
-            })
-
-    df_proc = pd.DataFrame(rows)
+    base = _country_distances(df, country_positions, ref_lat, ref_lon)
+    samples = []
+
+    def draw_samples() -> pd.DataFrame:
+        # Drawn at most once, and only by the parts of the figure that need
+        # them, so a cached density grid skips the sampling altogether
+        if not samples:
+            samples.append(_expand_samples(base, samples_per_country, np.random.default_rng(seed)))
+        return samples[0]
 
     # Create figure
     fig = go.Figure()
@@ -269,27 +393,55 @@ def create_threat_density_map():
     # Add density heat background
     # Reduced nbinsx and nbinsy by 50% to increase grid spacing
     # Reduced opacity to minimize background cells
-    fig.add_trace(go.Histogram2d(
-        x=df_proc["Distance"],
-        y=df_proc["Avg_Spend"],
-        colorscale="Blues",
-        showscale=False,
-        opacity=0.15,
-        nbinsx=10,
-        nbinsy=7,
-        hoverinfo="skip"
-    ))
+    if density_mode == "heatmap":
+        # Unseeded samples differ on every call, so only seeded grids are cached
+        bins_key = ((chart_data.columns_version(THREAT_MAP_COLUMNS), seed, samples_per_country)
+                    if seed is not None else None)
+        x_centers, y_centers, counts = _density_bins(draw_samples, bins_key)
+        # The outer bin edges are the sample extremes
+        x_half = (x_centers[1] - x_centers[0]) / 2
+        y_half = (y_centers[1] - y_centers[0]) / 2
+        background_extent = (x_centers[0] - x_half, x_centers[-1] + x_half,
+                             y_centers[0] - y_half, y_centers[-1] + y_half)
+        fig.add_trace(go.Heatmap(
+            x=x_centers,
+            y=y_centers,
+            z=counts,
+            zmin=0,
+            colorscale="Blues",
+            showscale=False,
+            opacity=0.15,
+            hoverinfo="skip"
+        ))
+    else:
+        df_proc = draw_samples()
+        background_extent = (df_proc["Distance"].min(), df_proc["Distance"].max(),
+                             df_proc["Avg_Spend"].min(), df_proc["Avg_Spend"].max())
+        fig.add_trace(go.Histogram2d(
+            x=df_proc["Distance"],
+            y=df_proc["Avg_Spend"],
+            colorscale="Blues",
+            showscale=False,
+            opacity=0.15,
+            nbinsx=DENSITY_NBINSX,
+            nbinsy=DENSITY_NBINSY,
+            hoverinfo="skip"
+        ))
 
     # Compute summary statistics
-    summary = df_proc.groupby("Country").agg(
-        Distance=("Distance", "mean"),
-        Avg_Spend=("Avg_Spend", "mean"),
-        Threat_Perception=("Threat_Perception", "first")
-    ).reset_index()
-    # Note: No need to merge with df_spend since we already have Avg_Spend from df_proc
+    if analytic_summary:
+        # The jitter is zero-mean, so the expected per-country means are the
+        # unjittered values themselves
+        summary = base.sort_values("Country").reset_index(drop=True)
+    else:
+        summary = draw_samples().groupby("Country").agg(
+            Distance=("Distance", "mean"),
+            Avg_Spend=("Avg_Spend", "mean"),
+            Threat_Perception=("Threat_Perception", "first")
+        ).reset_index()
 
     # FIX #2: Detect and resolve overlapping flags
-    summary = _detect_and_resolve_overlaps(summary, min_distance=3.5)
+    summary = _detect_and_resolve_overlaps(summary, min_distance=OVERLAP_MIN_DISTANCE_PX)
 
     # Calculate marker sizes based on spending
     # FIX #2: Use logarithmic scaling for better visual proportionality
@@ -367,10 +519,36 @@ def create_threat_density_map():
     # Add flag images inside bubbles using layout.images
     # When using data coordinates (xref="x", yref="y"), sizex and sizey are in data units
     images = []
+    flag_assets = {} if inline_flags or flag_mode == "atlas" else load_flag_manifest()
 
     # Calculate size range for images inside bubbles
+    # Scale flag size based on spending - use data coordinates
+    # Make flags about 4-8 degrees wide (100% increase, square aspect ratio to prevent distortion)
+    base_width = 4.0
+    flag_widths = {
+        row["Country"]: base_width + (norm_size_log(row["Avg_Spend"]) * 4.0)  # 4-8 degrees
+        for _, row in summary.iterrows()
+    }
 
+    # Estimate how many screen pixels each flag covers so only that many are
+    # rendered. The x-axis spans at least the flags' own extent, so this is
+    # an upper bound on the real on-screen width.
+    x_lo = min(row["Distance"] - flag_widths[row["Country"]] / 2 for _, row in summary.iterrows())
+    x_hi = max(row["Distance"] + flag_widths[row["Country"]] / 2 for _, row in summary.iterrows())
+    px_per_degree = PLOT_AREA_WIDTH_PX / max(x_hi - x_lo, 1e-9)
+    flag_display_px = {
+        c: min(w * px_per_degree, FLAG_ASSET_DISPLAY_PX) for c, w in flag_widths.items()
+    }
 
+    # Fetch every flag that is not prebuilt concurrently, under one deadline
+    if flag_mode == "images":
+        flag_images = get_circular_flags(
+            {c: FLAG_URLS[c] for c in summary["Country"] if c in FLAG_URLS and c not in flag_assets},
+            display_px=flag_display_px,
+            fmt=FLAG_IMAGE_FORMAT,
+            fetch=fetch_flags,
+        )
+    flag_boxes = []
 
     print("\n" + "=" * 70)
     print("FLAG IMAGE SIZING (INSIDE BUBBLES - CIRCULAR MASKED)")
@@ -382,11 +560,8 @@ def create_threat_density_map():
             # Get normalized spending (0 to 1) using logarithmic scaling
             norm_val = norm_size_log(row["Avg_Spend"])
 
-            # Scale flag size based on spending - use data coordinates
             # For data coordinates: width should be in degrees, height in dollars
-            # Make flags about 4-8 degrees wide (100% increase, square aspect ratio to prevent distortion)
-            base_width = 4.0
-            img_width = base_width + (norm_val * 4.0)  # 4-8 degrees
+            img_width = flag_widths[country]
 
             # Height should match width to maintain square aspect ratio and prevent distortion
             # Convert width (degrees) to height (dollars) using plot dimensions
@@ -395,13 +570,17 @@ def create_threat_density_map():
 
             # Debug output for sizing verification
             print(f"{country:15} | Norm: {norm_val:.3f} | "
-                  f"Width: {img_width:.2f}° | Height: {img_height/1e6:.1f}M | "
+                  f"Width: {img_width:.2f}° ({flag_display_px[country]:.0f}px) | Height: {img_height/1e6:.1f}M | "
                   f"Pos: ({row['Distance']:.1f}°, ${row['Avg_Spend']/1e6:.1f}M)")
 
-            # Download and create circular-masked flag image
+            if flag_mode == "atlas":
+                flag_boxes.append((country, row["Distance"], row["Avg_Spend"], img_width, img_height))
+                continue
+
+            # Look up the circular-masked flag image
             try:
-                # Create circular masked version
-                circular_flag = _create_circular_flag(FLAG_URLS[country], size=512)
+                # Prefer the prebuilt static asset, else the circular masked version
+                circular_flag = flag_assets.get(country) or flag_images[country]
 
                 # Add circular flag image - centered on the bubble marker
                 images.append(dict(
@@ -420,8 +599,16 @@ def create_threat_density_map():
             except Exception as e:
                 print(f"Error loading flag for {country}: {e}")
 
+    axis_ranges = {}
+    flags_complete = not any(is_placeholder_flag(img["source"]) for img in images)
+    if flag_mode == "atlas" and flag_boxes:
+        overlay, x_range, y_range, flags_complete = _flag_atlas_overlay(
+            flag_boxes, background_extent, fetch_flags=fetch_flags)
+        images.append(overlay)
+        axis_ranges = {"xaxis_range": x_range, "yaxis_range": y_range}
+
     print("=" * 70)
-    print(f"✅ Total flags created: {len(images)}")
+    print(f"✅ Total flags created: {len(flag_boxes) if flag_mode == 'atlas' else len(images)}")
     print("=" * 70 + "\n")
 
     # Update layout with flag images
@@ -452,46 +639,133 @@ def create_threat_density_map():
         showlegend=False,
         hovermode="closest",
         margin=dict(l=80, r=50, t=100, b=80),
-        images=images
+        images=images,
+        **axis_ranges
     )
 
+    return fig, flags_complete
+
+
+def create_threat_density_map(inline_flags: bool = False, flag_mode: str = "images",
+                              samples_per_country: int = JITTER_SAMPLES_PER_COUNTRY,
+                              analytic_summary: bool = False, seed: int = THREAT_MAP_SEED,
+                              density_mode: str = "histogram", fetch_flags: bool = True):
+    """Create geopolitical threat perception density map.
+
+    Args:
+        inline_flags: Embed the flags as base64 data URLs. By default flags
+            prebuilt by build_flag_assets.py are referenced as /assets/ URLs,
+            which only resolve when the figure is served by Dash; standalone
+            exports (HTML files, Chart Studio) should pass True. Countries
+            missing from the prebuilt manifest are always inlined.
+        flag_mode: "images" adds one layout image per country. "atlas" draws
+            every flag from a cached sprite sheet into a single overlay image
+            (always inline) and fixes the axis ranges to match it, so the
+            payload stays flat as the number of countries grows.
+        samples_per_country: Jittered samples drawn per country for the
+            density background; at least 1
+        analytic_summary: Place each country at its expected (unjittered)
+            position instead of the mean of its samples; with
+            density_mode="heatmap" and a cached grid, no samples are drawn
+        seed: Seed for the jitter generator, so equal arguments and data give
+            an identical figure; None draws fresh entropy
+        density_mode: "histogram" sends every jittered sample and lets
+            plotly.js bin them; "heatmap" bins them server-side with
+            np.histogram2d and sends only the DENSITY_NBINSX x DENSITY_NBINSY
+            grid, so the payload no longer grows with the sample count
+        fetch_flags: When False, flags that are neither prebuilt nor cached
+            are drawn as placeholders instead of being downloaded
+    """
+    fig, _ = _build_threat_density_map(inline_flags, flag_mode, samples_per_country, analytic_summary,
+                                       seed, density_mode, fetch_flags)
     return fig
 
 
+def get_threat_density_figure(data_version_token: int = None, seed: int = THREAT_MAP_SEED,
+                              inline_flags: bool = False, flag_mode: str = "images",
+                              samples_per_country: int = JITTER_SAMPLES_PER_COUNTRY,
+                              analytic_summary: bool = False, density_mode: str = "histogram",
+                              fetch_flags: bool = True) -> dict:
+    """Return the threat map as a plain figure dict, memoized.
+
+    Finished figures are kept as JSON in a bounded LRU keyed on the data
+    version and every argument, so repeat calls (e.g. each visit to the home
+    page) skip all figure work until the data they plot changes. Figures
+    that had to fall back to placeholder flags, or that use ``seed=None``,
+    are not memoized. ``fetch_flags`` is left out of the key: it only
+    changes figures that end up with placeholders.
+
+    Args:
+        data_version_token: Version of the data behind the map; defaults
+            to chart_data.columns_version(THREAT_MAP_COLUMNS), which only
+            changes when one of those columns does
+        seed, inline_flags, flag_mode, samples_per_country, analytic_summary,
+        density_mode, fetch_flags: As for create_threat_density_map
+    """
+    if data_version_token is None:
+        data_version_token = chart_data.columns_version(THREAT_MAP_COLUMNS)
+    key = (data_version_token, seed, inline_flags, flag_mode, samples_per_country, analytic_summary,
+           density_mode, tuple(sorted(load_flag_manifest().items())))
+
+    with _threat_map_lock:
+        fig_json = _threat_map_cache.get(key)
+        if fig_json is not None:
+            _threat_map_cache.move_to_end(key)
+
+    if fig_json is None:
+        fig, complete = _build_threat_density_map(inline_flags, flag_mode, samples_per_country,
+                                                  analytic_summary, seed, density_mode, fetch_flags)
+        fig_json = fig.to_json()
+        if complete and seed is not None:
+            with _threat_map_lock:
+                _threat_map_cache[key] = fig_json
+                while len(_threat_map_cache) > THREAT_MAP_CACHE_SIZE:
+                    _threat_map_cache.popitem(last=False)
+
+    return json.loads(fig_json)
+
+
 # ============================================================================
 # DASH APPLICATION
 # ============================================================================
 
-# Initialize the Dash app
-app = Dash(__name__)
-
-# Create the figure
-fig = create_threat_density_map()
-
-# Define the app layout
-app.layout = html.Div([
-    html.Div([
-        html.H1("Central Asian Regional Threat Perception Analysis",
-                style={"textAlign": "center", "marginBottom": 30}),
-        html.P("Interactive visualization of Central Asian countries' threat perception and military spending",
-               style={"textAlign": "center", "color": "#666", "marginBottom": 20}),
-    ], style={"padding": "20px"}),
-
-    html.Div([
-        dcc.Graph(figure=fig, style={"height": "700px"})
-    ], style={"padding": "20px"}),
-
-    html.Div([
-        html.Hr(),
-        html.P([
-            html.Strong("About this visualization: "),
-            "This chart analyzes Central Asian countries (Kazakhstan, Uzbekistan, Turkmenistan, Azerbaijan, Georgia) "
-            "and their threat perceptions. The visualization shows the relationship between geographic distance from a regional center, "
-            "threat perception intensity, and military spending. Larger country flags indicate higher military spending. "
-            "Hover over flags to see detailed information including distance in both degrees and kilometers."
-        ], style={"padding": "20px", "color": "#666", "fontSize": "14px"})
-    ], style={"padding": "20px", "backgroundColor": "#f9f9f9", "borderRadius": "5px", "margin": "20px"})
-], style={"fontFamily": "Arial, sans-serif", "maxWidth": "1200px", "margin": "0 auto"})
+def _serve_layout():
+    """Page layout; the figure is built (or fetched from the memo) per visit."""
+    return html.Div([
+        html.Div([
+            html.H1("Central Asian Regional Threat Perception Analysis",
+                    style={"textAlign": "center", "marginBottom": 30}),
+            html.P("Interactive visualization of Central Asian countries' threat perception and military spending",
+                   style={"textAlign": "center", "color": "#666", "marginBottom": 20}),
+        ], style={"padding": "20px"}),
+
+        html.Div([
+            dcc.Graph(figure=get_threat_density_figure(density_mode="heatmap"), style={"height": "700px"})
+        ], style={"padding": "20px"}),
+
+        html.Div([
+            html.Hr(),
+            html.P([
+                html.Strong("About this visualization: "),
+                "This chart analyzes Central Asian countries (Kazakhstan, Uzbekistan, Turkmenistan, Azerbaijan, Georgia) "
+                "and their threat perceptions. The visualization shows the relationship between geographic distance from a regional center, "
+                "threat perception intensity, and military spending. Larger country flags indicate higher military spending. "
+                "Hover over flags to see detailed information including distance in both degrees and kilometers."
+            ], style={"padding": "20px", "color": "#666", "fontSize": "14px"})
+        ], style={"padding": "20px", "backgroundColor": "#f9f9f9", "borderRadius": "5px", "margin": "20px"})
+    ], style={"fontFamily": "Arial, sans-serif", "maxWidth": "1200px", "margin": "0 auto"})
+
+
+def create_app() -> Dash:
+    """Create the standalone threat map Dash app.
+
+    Nothing is built at import time: the figure (and any flag downloads)
+    is produced on the first page load, so importing this module from the
+    multi-page app, the pages or the export scripts stays cheap.
+    """
+    app = Dash(__name__)
+    app.layout = _serve_layout
+    return app
 
 
 # ============================================================================
@@ -508,5 +782,6 @@ if __name__ == "__main__":
     print("\n" + "=" * 70)
     
     # Run the app
+    app = create_app()
     app.run(debug=True, host="0.0.0.0", port=8050)
 
@@ -0,0 +1,51 @@
+"""
+Gunicorn settings (read automatically from the working directory)
+
+Before any worker starts, the master loads the dataset once, builds its
+indexes and writes them to a memory-backed file (chart_data.
+export_shared_dataset). Workers map that file instead of loading their own
+copy, so dataset memory stays flat as workers are added. A SQLite source
+is not exported; workers query the database file directly.
+
+Each worker starts its data watcher and figure warm-up once it has loaded
+the app (Transcaspian_Defense_Data_app.init), so no thread is started in
+the master, even with preload_app.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import chart_data
+
+_shared_path = None
+
+
+def on_starting(server):
+    global _shared_path
+    try:
+        _shared_path = chart_data.export_shared_dataset()
+    except Exception as e:
+        # Workers then load the data themselves, as without this hook
+        print(f"❌ Could not share the dataset between workers: {e}")
+        return
+    if _shared_path is None:
+        return  # SQLite: workers query the database themselves
+    # Workers are forked from this process; start them without a private
+    # copy so they map the shared file on first use
+    chart_data.SHARED_DATA_PATH = _shared_path
+    chart_data.reset_dataset()
+
+
+def post_worker_init(worker):
+    # Runs in the worker after the fork and after the app (and so every
+    # page's warm-up registration) is imported
+    import Transcaspian_Defense_Data_app
+
+    Transcaspian_Defense_Data_app.init()
+
+
+def on_exit(server):
+    if _shared_path and os.path.exists(_shared_path):
+        os.remove(_shared_path)
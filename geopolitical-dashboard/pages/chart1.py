@@ -16,7 +16,8 @@ dash.register_page(__name__, path='/chart1', name='Supplier Influence Surface')
 
 # Import data module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from chart_data import get_data, filter_data
+from chart_data import query_data, get_influence_tensor, TENSOR_COLUMNS
+from figure_cache import memoize_figure, register_warmup
 
 # Component configuration
 component_id = "defense_supplier_influence_3d_surface"
@@ -30,9 +31,10 @@ influence_type_options = [
 influence_type_default = "Influence"
 
 
+@memoize_figure(columns=["Country"] + TENSOR_COLUMNS)
 def create_3d_surface_figure(influence_type="Influence", show_all_countries=True):
     """Create the 3D surface chart."""
-    df = filter_data(get_data())
+    df = query_data(columns=["Country"])
 
     if len(df) == 0:
         empty_fig = go.Figure()
@@ -49,29 +51,12 @@ def create_3d_surface_figure(influence_type="Influence", show_all_countries=True
     if not show_all_countries and len(df) > 0:
         df = df.head(3)
 
-    suppliers = ["US", "Russia", "China", "Turkiye_Israel"]
     countries = df["Country"].tolist()
 
-    z_data = []
-    for country in countries:
-        country_data = df[df["Country"] == country]
-        if len(country_data) == 0:
-            z_row = [0, 0, 0, 0]
-        else:
-            z_row = []
-            for supplier in suppliers:
-                col_name = f"{influence_type}_{supplier}_numeric"
-                if col_name in country_data.columns:
-                    value = country_data[col_name].iloc[0]
-                    if pd.isna(value):
-                        z_row.append(0)
-                    else:
-                        z_row.append(float(value))
-                else:
-                    z_row.append(0)
-        z_data.append(z_row)
-
-    if len(z_data) == 0:
+    # One row per country, one column per supplier
+    z_array = get_influence_tensor().matrix(influence_type, countries)
+
+    if len(z_array) == 0:
         empty_fig = go.Figure()
         empty_fig.update_layout(
             title="No data available for surface plot",
@@ -83,8 +68,6 @@ def create_3d_surface_figure(influence_type="Influence", show_all_countries=True
         )
         return empty_fig
 
-    z_array = np.array(z_data)
-
     x_labels = ["US", "Russia", "China", "Türkiye/Israel"]
     y_labels = countries
 
@@ -216,5 +199,10 @@ layout = dbc.Container(
 def update_chart(influence_type, country_toggle):
     """Update the 3D surface chart based on user inputs."""
     show_all = 'enabled' in (country_toggle or [])
-    return create_3d_surface_figure(influence_type or influence_type_default, show_all)
+    return create_3d_surface_figure.cached(influence_type or influence_type_default, show_all)
+
+
+register_warmup(create_3d_surface_figure.cached,
+                influence_type=[o["value"] for o in influence_type_options],
+                show_all_countries=[True, False])
 
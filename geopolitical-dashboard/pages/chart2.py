@@ -15,7 +15,8 @@ dash.register_page(__name__, path='/chart2', name='Regional Influence Map')
 
 # Import data module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from chart_data import get_data, filter_data
+from chart_data import query_data
+from figure_cache import memoize_figure, register_warmup
 
 # Component configuration
 component_id = "threat_perception_choropleth_map"
@@ -30,9 +31,12 @@ control_options = [
 control_default = "Influence_US_numeric"
 
 
+@memoize_figure(columns=["Country", "Threat Perception", "Defense Priorities", "Suppliers"]
+                + [o["value"] for o in control_options])
 def create_choropleth_figure(color_by=control_default):
     """Create the choropleth map."""
-    df = filter_data(get_data()).copy()
+    df = query_data(columns=["Country", "Threat Perception", "Defense Priorities",
+                             "Suppliers", color_by])
 
     if len(df) == 0:
         empty_fig = go.Figure()
@@ -171,4 +175,7 @@ layout = dbc.Container(
 )
 def update_chart(color_by):
     """Update the choropleth map based on user input."""
-    return create_choropleth_figure(color_by or control_default)
+    return create_choropleth_figure.cached(color_by or control_default)
+
+
+register_warmup(create_choropleth_figure.cached, color_by=[o["value"] for o in control_options])
@@ -7,6 +7,7 @@ from dash import dcc, html, callback, Input, Output
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 import sys
 import os
 
@@ -14,7 +15,8 @@ dash.register_page(__name__, path='/chart3', name='Defense Systems Analysis')
 
 # Import data module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from chart_data import get_data, filter_data
+from chart_data import get_data, get_systems_catalog
+from figure_cache import memoize_figure, register_warmup
 
 # Component configuration
 component_id = "defense_systems_3d_scatter"
@@ -30,9 +32,15 @@ supplier_options = [
 supplier_default = "all"
 
 
+SUPPLIERS = ['US', 'Russia', 'China', 'Turkiye_Israel']
+CHART3_COLUMNS = (["Country", "Threat Perception", "Defense Priorities"]
+                  + [f"Systems_{s}" for s in SUPPLIERS] + [f"Influence_{s}_numeric" for s in SUPPLIERS])
+
+
+@memoize_figure(columns=CHART3_COLUMNS)
 def create_3d_scatter_figure(supplier_filter="all"):
     """Create the 3D scatter plot."""
-    df = filter_data(get_data()).copy()
+    df = get_data(CHART3_COLUMNS)
     
     if len(df) == 0:
         empty_fig = go.Figure()
@@ -46,34 +54,30 @@ def create_3d_scatter_figure(supplier_filter="all"):
         )
         return empty_fig
 
-    plot_data = []
-    
-    for _, row in df.iterrows():
-        country = row['Country']
-        suppliers_data = [
-            ('US', row.get('Systems_US'), row.get('Influence_US_numeric', 0)),
-            ('Russia', row.get('Systems_Russia'), row.get('Influence_Russia_numeric', 0)),
-            ('China', row.get('Systems_China'), row.get('Influence_China_numeric', 0)),
-            ('Turkiye_Israel', row.get('Systems_Turkiye_Israel'), row.get('Influence_Turkiye_Israel_numeric', 0))
-        ]
-        
-        for supplier, systems, influence in suppliers_data:
-            if pd.isna(systems) or systems == '' or systems == 'N/A':
-                continue
-            if supplier_filter != "all" and supplier != supplier_filter:
-                continue
-            system_count = len([s.strip() for s in str(systems).replace(';', ',').split(',') if s.strip()])
-            plot_data.append({
-                'Country': country,
-                'Supplier': supplier,
-                'System_Count': system_count,
-                'Influence': influence if not pd.isna(influence) else 0,
-                'Systems': systems,
-                'Threat_Perception': row.get('Threat Perception', ''),
-                'Defense_Priorities': row.get('Defense Priorities', '')
-            })
+    suppliers = SUPPLIERS
+    if supplier_filter != "all":
+        suppliers = [supplier for supplier in suppliers if supplier == supplier_filter]
+
+    # One row per data row, one column per supplier; the catalog is built
+    # from the same cached dataset, so its rows line up with df's
+    catalog = get_systems_catalog()
+    system_counts = catalog.row_counts[:, [catalog.supplier_index[s] for s in suppliers]]
+    influence = (df.reindex(columns=[f"Influence_{s}_numeric" for s in suppliers])
+                 .apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy())
+
+    # Row-major, so traces and the country axis keep the data's order
+    rows, cols = np.nonzero(system_counts)
+    plot_data = {
+        'Country': df['Country'].to_numpy(dtype=object)[rows],
+        'Supplier': np.asarray(suppliers, dtype=object)[cols],
+        'System_Count': system_counts[rows, cols],
+        'Influence': influence[rows, cols],
+        'Systems': df[[f"Systems_{s}" for s in suppliers]].to_numpy()[rows, cols],
+        'Threat_Perception': df['Threat Perception'].to_numpy()[rows],
+        'Defense_Priorities': df['Defense Priorities'].to_numpy()[rows],
+    }
     
-    if not plot_data:
+    if len(rows) == 0:
         empty_fig = go.Figure()
         empty_fig.update_layout(
             title="No data available for selected supplier",
@@ -177,4 +181,7 @@ layout = dbc.Container(
 
 @callback(Output('chart3-graph', 'figure'), Input(supplier_control_id, 'value'))
 def update_chart(supplier_filter):
-    return create_3d_scatter_figure(supplier_filter or supplier_default)
+    return create_3d_scatter_figure.cached(supplier_filter or supplier_default)
+
+
+register_warmup(create_3d_scatter_figure.cached, supplier_filter=[o["value"] for o in supplier_options])
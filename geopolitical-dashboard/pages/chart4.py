@@ -12,7 +12,8 @@ import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-from chart_data import get_data, filter_data
+from chart_data import query_data, get_influence_tensor, TENSOR_COLUMNS
+from figure_cache import memoize_figure, register_warmup
 
 dash.register_page(__name__, path='/chart4', name='Multi-Country Radar')
 
@@ -20,9 +21,15 @@ component_id = "multi_country_influence_radar"
 country_selector_id = f"{component_id}_countries"
 metric_selector_id = f"{component_id}_metric"
 
+metric_options = [
+    {"label": "Influence Metrics", "value": "influence"},
+    {"label": "Matrix Metrics", "value": "matrix"}
+]
+
+@memoize_figure(columns=["Country"] + TENSOR_COLUMNS)
 def create_radar_figure(selected_countries=None, metric_type="influence"):
     """Create radar chart for selected countries."""
-    df = filter_data(get_data())
+    df = query_data(columns=['Country'])
 
     if selected_countries is None:
         selected_countries = df['Country'].unique().tolist()
@@ -41,30 +48,23 @@ def create_radar_figure(selected_countries=None, metric_type="influence"):
 
     # Define the metrics based on selection
     if metric_type == "influence":
-        metric_columns = ['Influence_US_numeric', 'Influence_Russia_numeric', 'Influence_China_numeric', 'Influence_Turkiye_Israel_numeric']
+        metric = "Influence"
         metric_labels = ['US Influence', 'Russia Influence', 'China Influence', 'Türkiye/Israel Influence']
     else:  # matrix
-        metric_columns = ['Matrix_US_numeric', 'Matrix_Russia_numeric', 'Matrix_China_numeric', 'Matrix_Turkiye_Israel_numeric']
+        metric = "Matrix"
         metric_labels = ['US Matrix', 'Russia Matrix', 'China Matrix', 'Türkiye/Israel Matrix']
 
+    # Only countries that survived filtering get a trace
+    available = set(df['Country'])
+    selected_countries = [country for country in selected_countries if country in available]
+    radar_values = get_influence_tensor().matrix(metric, selected_countries)
+
     # Create radar chart
     fig = go.Figure()
 
     # Add a trace for each selected country
-    for country in selected_countries:
-        country_data = df[df['Country'] == country]
-        if len(country_data) == 0:
-            continue
-
-        row = country_data.iloc[0]
-
-        # Extract values for radar chart, handling NaN values
-        values = []
-        for col in metric_columns:
-            val = row.get(col, np.nan)
-            if pd.isna(val):
-                val = 0
-            values.append(float(val))
+    for country, row in zip(selected_countries, radar_values):
+        values = row.tolist()
 
         # Close the radar chart by repeating the first value
         values_closed = values + [values[0]]
@@ -103,7 +103,7 @@ def create_radar_figure(selected_countries=None, metric_type="influence"):
     return fig
 
 # Get unique countries for dropdown
-df_data = get_data()
+df_data = query_data(columns=['Country'])
 unique_countries = df_data['Country'].unique().tolist()
 country_options = [{'label': country, 'value': country} for country in unique_countries]
 default_countries = unique_countries
@@ -131,10 +131,7 @@ layout = dbc.Container(
                 html.Label("Select Metric Type:", style={"fontWeight": "bold"}),
                 dcc.Dropdown(
                     id=metric_selector_id,
-                    options=[
-                        {"label": "Influence Metrics", "value": "influence"},
-                        {"label": "Matrix Metrics", "value": "matrix"}
-                    ],
+                    options=metric_options,
                     value="influence",
                     style={"minWidth": "200px"}
                 ),
@@ -153,4 +150,9 @@ layout = dbc.Container(
     [Input(country_selector_id, 'value'), Input(metric_selector_id, 'value')]
 )
 def update_chart(selected_countries, metric_type):
-    return create_radar_figure(selected_countries or default_countries, metric_type or "influence")
+    return create_radar_figure.cached(selected_countries or default_countries, metric_type or "influence")
+
+
+# Any subset of countries can be picked; warm the default selection
+register_warmup(create_radar_figure.cached, selected_countries=[default_countries],
+                metric_type=[o["value"] for o in metric_options])
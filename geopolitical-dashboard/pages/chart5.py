@@ -12,7 +12,8 @@ import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-from chart_data import get_data, filter_data
+from chart_data import query_data, get_influence_tensor, TENSOR_COLUMNS
+from figure_cache import memoize_figure, register_warmup
 
 dash.register_page(__name__, path='/chart5', name='Priorities Heatmap')
 
@@ -20,9 +21,19 @@ component_id = "defense_priorities_correlation_heatmap"
 grouping_control_id = f"{component_id}_grouping"
 intensity_control_id = f"{component_id}_intensity"
 
+grouping_options = [
+    {"label": "By Country", "value": "country"},
+    {"label": "By Supplier", "value": "supplier"}
+]
+intensity_options = [
+    {"label": "Influence", "value": "influence"},
+    {"label": "Matrix", "value": "matrix"}
+]
+
+@memoize_figure(columns=["Country"] + TENSOR_COLUMNS)
 def create_heatmap_figure(grouping="country", intensity_metric="influence"):
     """Create correlation heatmap for defense priorities."""
-    df = filter_data(get_data())
+    df = query_data(columns=['Country'])
 
     if len(df) == 0:
         empty_fig = go.Figure()
@@ -33,24 +44,15 @@ def create_heatmap_figure(grouping="country", intensity_metric="influence"):
         return empty_fig
 
     # Define metrics based on intensity selection
-    if intensity_metric == "influence":
-        metric_cols = ['Influence_US_numeric', 'Influence_Russia_numeric', 'Influence_China_numeric', 'Influence_Turkiye_Israel_numeric']
-        metric_labels = ['US', 'Russia', 'China', 'Türkiye/Israel']
-    else:
-        metric_cols = ['Matrix_US_numeric', 'Matrix_Russia_numeric', 'Matrix_China_numeric', 'Matrix_Turkiye_Israel_numeric']
-        metric_labels = ['US', 'Russia', 'China', 'Türkiye/Israel']
-
-    # Create correlation matrix
+    metric = "Influence" if intensity_metric == "influence" else "Matrix"
+    metric_labels = ['US', 'Russia', 'China', 'Türkiye/Israel']
+
+    # Create correlation matrix: one row per country, one column per supplier
+    countries = df['Country'].unique()
+    z_matrix = get_influence_tensor().matrix(metric, countries)
+
     if grouping == "country":
-        countries = df['Country'].unique()
-        z_data = []
-        for country in countries:
-            country_data = df[df['Country'] == country]
-            row = []
-            for col in metric_cols:
-                val = country_data[col].iloc[0] if len(country_data) > 0 else 0
-                row.append(float(val) if pd.notna(val) else 0)
-            z_data.append(row)
+        z_data = z_matrix
 
         fig = go.Figure(data=go.Heatmap(
             z=z_data,
@@ -67,18 +69,11 @@ def create_heatmap_figure(grouping="country", intensity_metric="influence"):
         )
     else:  # supplier
         suppliers = metric_labels
-        z_data = []
-        for i, supplier in enumerate(suppliers):
-            row = []
-            for country in df['Country'].unique():
-                country_data = df[df['Country'] == country]
-                val = country_data[metric_cols[i]].iloc[0] if len(country_data) > 0 else 0
-                row.append(float(val) if pd.notna(val) else 0)
-            z_data.append(row)
+        z_data = z_matrix.T
 
         fig = go.Figure(data=go.Heatmap(
             z=z_data,
-            x=df['Country'].unique(),
+            x=countries,
             y=suppliers,
             colorscale='RdYlBu_r',
             colorbar=dict(title="Influence Level")
@@ -105,10 +100,7 @@ layout = dbc.Container(
                 html.Label("Grouping:", style={"fontWeight": "bold"}),
                 dcc.Dropdown(
                     id=grouping_control_id,
-                    options=[
-                        {"label": "By Country", "value": "country"},
-                        {"label": "By Supplier", "value": "supplier"}
-                    ],
+                    options=grouping_options,
                     value="country",
                     style={"minWidth": "200px"}
                 ),
@@ -117,10 +109,7 @@ layout = dbc.Container(
                 html.Label("Intensity Metric:", style={"fontWeight": "bold"}),
                 dcc.Dropdown(
                     id=intensity_control_id,
-                    options=[
-                        {"label": "Influence", "value": "influence"},
-                        {"label": "Matrix", "value": "matrix"}
-                    ],
+                    options=intensity_options,
                     value="influence",
                     style={"minWidth": "200px"}
                 ),
@@ -139,4 +128,8 @@ layout = dbc.Container(
     [Input(grouping_control_id, 'value'), Input(intensity_control_id, 'value')]
 )
 def update_chart(grouping, intensity_metric):
-    return create_heatmap_figure(grouping or "country", intensity_metric or "influence")
+    return create_heatmap_figure.cached(grouping or "country", intensity_metric or "influence")
+
+
+register_warmup(create_heatmap_figure.cached, grouping=[o["value"] for o in grouping_options],
+                intensity_metric=[o["value"] for o in intensity_options])
@@ -13,16 +13,23 @@ import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 import numpy as np
-from chart_data import get_data, filter_data
+from chart_data import query_data
+from figure_cache import memoize_figure, register_warmup
 
 dash.register_page(__name__, path='/chart6', name='Regional Density')
 
 component_id = "density_map"
 metric_selector_id = f"{component_id}_metric"
 
+metric_options = [
+    {"label": "Defense Spending", "value": "spending"},
+    {"label": "Threat Perception", "value": "threat"}
+]
+
+@memoize_figure(columns=["Country", "Avg_Spend", "Threat Perception"])
 def create_density_map_figure(metric="spending"):
     """Create density map for regional analysis."""
-    df = filter_data(get_data())
+    df = query_data(columns=["Country", "Avg_Spend", "Threat Perception"])
 
     if len(df) == 0:
         empty_fig = go.Figure()
@@ -99,10 +106,7 @@ layout = dbc.Container(
                 html.Label("Metric:", style={"fontWeight": "bold"}),
                 dcc.Dropdown(
                     id=metric_selector_id,
-                    options=[
-                        {"label": "Defense Spending", "value": "spending"},
-                        {"label": "Threat Perception", "value": "threat"}
-                    ],
+                    options=metric_options,
                     value="spending",
                     style={"minWidth": "200px"}
                 ),
@@ -121,4 +125,7 @@ layout = dbc.Container(
     Input(metric_selector_id, 'value')
 )
 def update_chart(metric):
-    return create_density_map_figure(metric or "spending")
+    return create_density_map_figure.cached(metric or "spending")
+
+
+register_warmup(create_density_map_figure.cached, metric=[o["value"] for o in metric_options])
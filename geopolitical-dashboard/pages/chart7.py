@@ -12,16 +12,18 @@ import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-from chart_data import get_data, filter_data
+from chart_data import query_data, get_influence_tensor, TENSOR_COLUMNS
+from figure_cache import memoize_figure, register_warmup
 
 dash.register_page(__name__, path='/chart7', name='Supplier Connections')
 
 component_id = "supplier_receiver_connection_map"
 supplier_selector_id = f"{component_id}_supplier"
 
+@memoize_figure(columns=["Country"] + TENSOR_COLUMNS)
 def create_connection_map_figure(selected_supplier="all"):
     """Create supplier-receiver connection map."""
-    df = filter_data(get_data())
+    df = query_data(columns=['Country'])
 
     if len(df) == 0:
         empty_fig = go.Figure()
@@ -43,18 +45,17 @@ def create_connection_map_figure(selected_supplier="all"):
     target = []
     value = []
 
+    # One row per country, one column per supplier
+    influence = get_influence_tensor().matrix("Influence", df['Country'].tolist())
+
     for idx, supplier in enumerate(suppliers):
         if selected_supplier != "all" and supplier != selected_supplier:
             continue
 
-        influence_col = f'Influence_{supplier}_numeric'
-
-        for country_idx, (_, row) in enumerate(df.iterrows()):
-            influence = row.get(influence_col, 0)
-            if pd.notna(influence) and influence > 0:
-                source.append(idx)
-                target.append(len(supplier_labels) + country_idx)
-                value.append(float(influence) * 10)  # Scale for visibility
+        country_idx = np.flatnonzero(influence[:, idx] > 0)
+        source.extend([idx] * len(country_idx))
+        target.extend((len(supplier_labels) + country_idx).tolist())
+        value.extend((influence[country_idx, idx] * 10).tolist())  # Scale for visibility
 
     fig = go.Figure(data=[go.Sankey(
         node=dict(
@@ -122,4 +123,7 @@ layout = dbc.Container(
     Input(supplier_selector_id, 'value')
 )
 def update_chart(selected_supplier):
-    return create_connection_map_figure(selected_supplier or "all")
+    return create_connection_map_figure.cached(selected_supplier or "all")
+
+
+register_warmup(create_connection_map_figure.cached, selected_supplier=[o["value"] for o in supplier_options])
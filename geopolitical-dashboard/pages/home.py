@@ -13,7 +13,8 @@ dash.register_page(__name__, path='/')
 
 # Import the geopolitical app function
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from geopolitical_app import create_threat_density_map
+from geopolitical_app import get_threat_density_figure
+from figure_cache import register_warmup
 
 # Create the layout
 layout = dbc.Container(
@@ -62,6 +63,11 @@ layout = dbc.Container(
     Input('threat-perception-graph', 'id')
 )
 def update_graph(_):
-    """Generate the threat perception map"""
-    return create_threat_density_map()
+    """Serve the threat perception map, rebuilt only when the data changes"""
+    return get_threat_density_figure(density_mode="heatmap")
+
+
+# The warm-up draws flags from the prebuilt assets or as placeholders, so a
+# booting worker makes no requests to the flag CDN
+register_warmup(get_threat_density_figure, density_mode=["heatmap"], fetch_flags=[False])
 
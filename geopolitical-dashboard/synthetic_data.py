@@ -0,0 +1,181 @@
+"""
+Seeded synthetic datasets with the chart_data schema, at any size
+
+Generates one row per country per year with every column of the mock data
+(plus Year): threat perceptions, priority and supplier lists, spending,
+distances, influence/matrix scores and Systems_* strings drawn from real
+equipment names. Countries and suppliers beyond the real ones are numbered
+("Region 00042", "Supplier 117"); the first five countries are the real
+ones, so the region blocs, flags and map positions still apply to them.
+Each country keeps its lists and scores from year to year with occasional
+changes, so the time dimension looks like history rather than noise.
+
+The same spec and seed always give the same frame. Set
+CHART_DATA_SYNTHETIC (e.g. "countries=10000,suppliers=200,years=50") to
+serve one instead of the mock data, or write one to a file:
+    python synthetic_data.py countries=10000,suppliers=200,years=50 data.parquet
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+# Defaults for spec keys that are left out ("1" uses all of them)
+SYNTHETIC_DEFAULTS = {"countries": 10_000, "suppliers": 200, "years": 50, "seed": 0}
+
+# Last generated year, matching the mock data's snapshot
+LAST_YEAR = 2025
+
+REAL_COUNTRIES = ["Kazakhstan", "Uzbekistan", "Turkmenistan", "Azerbaijan", "Georgia"]
+REAL_SUPPLIERS = ["Russia", "China", "US", "Turkey", "Israel", "NATO"]
+
+THREATS = ["Regional Instability", "Border Security", "Energy Competition", "Russian Influence",
+           "Terrorism", "Water Disputes", "Cyber Attacks", "Maritime Disputes"]
+PRIORITIES = ["Border Security", "Regional Stability", "Terrorism Prevention",
+              "Energy Infrastructure Protection", "Territorial Integrity", "Energy Security",
+              "NATO Integration", "Russian Deterrence", "Air Defense Modernization",
+              "Counter-Narcotics", "Cyber Defense", "Maritime Security"]
+
+# Systems_<supplier> columns and the equipment each supplier fields
+SYSTEMS = {
+    "US": ["Patriot Air Defense", "F-16 Fighter Jets", "HIMARS", "Stinger MANPADS",
+           "Javelin ATGMs", "UH-60 Black Hawk Helicopters", "Humvee Vehicles",
+           "NASAMS Air Defense", "C-130 Transport Aircraft", "ScanEagle UAVs"],
+    "Russia": ["S-300 Air Defense", "S-400 Air Defense", "Mi-24 Helicopters", "T-72 Tanks",
+               "T-90 Tanks", "Su-30SM Fighter Jets", "BTR-82A Vehicles", "Tor-M2 Air Defense",
+               "Kornet ATGMs", "Orlan-10 UAVs"],
+    "China": ["FD-2000 Air Defense", "CH-4 UAVs", "Wing Loong UAVs", "JF-17 Fighter Jets",
+              "VT-4 Tanks", "HQ-9 Air Defense", "VN-1 Vehicles", "PL-12 Missiles"],
+    "Turkiye_Israel": ["Bayraktar TB2 UAVs", "Akinci UAVs", "Harop Loitering Munitions",
+                       "David's Sling", "Spike Missiles", "Iron Dome", "Hermes 900 UAVs",
+                       "Otokar Cobra Vehicles"],
+}
+
+# Distinct list strings drawn per list column; rows pick from these, so the
+# columns have realistic cardinality and generate quickly
+LIST_POOL_SIZE = 4096
+
+# Chance per country and year that a list, threat or score changes
+CHANGE_RATE = 0.1
+
+
+def parse_spec(spec: str) -> dict:
+    """Generator arguments from "key=value,..." ("1" or "" for the defaults)."""
+    params = dict(SYNTHETIC_DEFAULTS)
+    for item in spec.split(","):
+        item = item.strip()
+        if not item or item == "1":
+            continue
+        key, _, value = item.partition("=")
+        if key not in params:
+            raise ValueError(f"Unknown synthetic dataset setting {key!r}, expected one of {list(params)}")
+        params[key] = int(value)
+    return params
+
+
+def _list_pool(rng, vocabulary, max_entries: int, separator: str, none_share: float = 0.0) -> list:
+    """Distinct joined lists of 1..max_entries entries, earlier entries likelier."""
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    weights /= weights.sum()
+    pool = ["None"] if none_share else []
+    for _ in range(LIST_POOL_SIZE):
+        k = min(int(rng.integers(1, max_entries + 1)), len(vocabulary))
+        entries = rng.choice(len(vocabulary), size=k, replace=False, p=weights)
+        pool.append(separator.join(vocabulary[i] for i in entries))
+    return list(dict.fromkeys(pool))
+
+
+def _persistent(rng, n_countries: int, n_years: int, draw) -> np.ndarray:
+    """(countries, years) values that change with CHANGE_RATE per year.
+
+    ``draw(shape)`` returns fresh values; each country keeps its last drawn
+    value until the next change.
+    """
+    fresh = draw((n_countries, n_years))
+    changes = rng.random((n_countries, n_years)) < CHANGE_RATE
+    changes[:, 0] = True
+    last = np.maximum.accumulate(np.where(changes, np.arange(n_years), 0), axis=1)
+    return np.take_along_axis(fresh, last, axis=1)
+
+
+def _categorical(rng, n_countries: int, n_years: int, pool: list, none_share: float = 0.0) -> pd.Categorical:
+    """Persistent picks from ``pool`` (pool[0] with probability ``none_share``)."""
+    def draw(shape):
+        codes = rng.integers(1 if none_share else 0, len(pool), shape)
+        if none_share:
+            codes[rng.random(shape) < none_share] = 0
+        return codes
+    codes = _persistent(rng, n_countries, n_years, draw)
+    return pd.Categorical.from_codes(codes.ravel(), pool)
+
+
+def generate_dataset(countries: int = SYNTHETIC_DEFAULTS["countries"],
+                     suppliers: int = SYNTHETIC_DEFAULTS["suppliers"],
+                     years: int = SYNTHETIC_DEFAULTS["years"],
+                     seed: int = SYNTHETIC_DEFAULTS["seed"]) -> pd.DataFrame:
+    """Synthetic dataset of ``countries * years`` rows, ordered by country then year.
+
+    Args:
+        countries: Number of countries/regions (the first five are real)
+        suppliers: Number of distinct names in the Suppliers lists
+        years: Number of years, ending at LAST_YEAR
+        seed: Random seed; equal arguments give equal frames
+    """
+    rng = np.random.default_rng(seed)
+    country_names = REAL_COUNTRIES + [f"Region {i:05d}" for i in range(len(REAL_COUNTRIES), countries)]
+    country_names = country_names[:countries]
+    supplier_names = REAL_SUPPLIERS + [f"Supplier {i:03d}" for i in range(len(REAL_SUPPLIERS), suppliers)]
+    supplier_names = supplier_names[:suppliers]
+    shape = (countries, years)
+
+    df = pd.DataFrame({
+        "Country": pd.Categorical(np.repeat(country_names, years), categories=country_names),
+        "Year": np.tile(np.arange(LAST_YEAR - years + 1, LAST_YEAR + 1), countries).astype(np.int16),
+    })
+
+    # Spending grows a few percent a year around a log-normal base
+    base = rng.lognormal(np.log(60e6), 0.8, countries)
+    growth = np.cumprod(1 + rng.normal(0.03, 0.05, shape), axis=1)
+    df["Avg_Spend"] = (base[:, None] * growth).ravel().astype(np.int64)
+    df["Threat Perception"] = _categorical(rng, countries, years, THREATS)
+    df["Defense Priorities"] = _categorical(rng, countries, years, _list_pool(rng, PRIORITIES, 3, ", "))
+    df["Suppliers"] = _categorical(rng, countries, years, _list_pool(rng, supplier_names, 4, ", "))
+
+    # 0-3 scores in half steps
+    for metric in ("Influence", "Matrix"):
+        for supplier in SYSTEMS:
+            scores = _persistent(rng, countries, years, lambda s: rng.integers(0, 7, s) / 2)
+            df[f"{metric}_{supplier}_numeric"] = scores.ravel().astype(np.float32)
+    for supplier, systems in SYSTEMS.items():
+        pool = _list_pool(rng, systems, 4, "; ", none_share=0.3)
+        df[f"Systems_{supplier}"] = _categorical(rng, countries, years, pool, none_share=0.3)
+
+    for region, center in (("Europe", 3000), ("China", 2000), ("Russia", 1300), ("Near", 1000)):
+        distance = rng.normal(center, center / 4, countries).clip(100).astype(np.int32)
+        df[f"Distance_{region}"] = np.repeat(distance, years)
+    return df
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        return 1
+    spec, path = sys.argv[1], sys.argv[2]
+    df = generate_dataset(**parse_spec(spec))
+    if path.endswith((".sqlite", ".sqlite3", ".db")):
+        from chart_data import build_sqlite_database
+        build_sqlite_database(df, path)
+    elif path.endswith((".arrow", ".feather", ".ipc")):
+        df.to_feather(path)
+    else:
+        df.to_parquet(path)
+    print(f"✅ Wrote {len(df):,} rows ({df['Country'].nunique():,} countries) to {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Tests for single-flight builds through the shared figure store
+
+Threads stand in for workers: they share one FileFigureStore in a
+temporary directory, as workers on a host share FIGURE_CACHE_URL.
+"""
+
+import os
+import sys
+import threading
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import figure_cache
+from figure_cache import FileFigureStore, _fetch_or_build
+
+KEY = "figure"
+
+
+class CountingBuilder:
+    """Builder that takes ``seconds`` and counts how often it runs."""
+
+    def __init__(self, seconds: float = 0.0, error: Exception = None):
+        self.seconds = seconds
+        self.error = error
+        self.builds = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> str:
+        with self._lock:
+            self.builds += 1
+        time.sleep(self.seconds)
+        if self.error is not None:
+            raise self.error
+        return '{"data": []}'
+
+
+class BrokenStore:
+    """Store whose every call fails, like an unreachable Redis."""
+
+    def get(self, key):
+        raise ConnectionError("store down")
+
+    def lock(self, key, timeout):
+        raise ConnectionError("store down")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FileFigureStore(str(tmp_path))
+
+
+def test_concurrent_misses_build_once(store):
+    build = CountingBuilder(seconds=0.3)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(_fetch_or_build(store, KEY, build)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert build.builds == 1
+    assert results == ['{"data": []}'] * 8
+
+
+def test_result_is_stored_for_later_callers(store):
+    build = CountingBuilder()
+    _fetch_or_build(store, KEY, build)
+    assert _fetch_or_build(store, KEY, build) == '{"data": []}'
+    assert build.builds == 1
+    assert zlib.decompress(store.get(KEY)) == b'{"data": []}'
+
+
+def test_builder_errors_propagate_and_release_the_lock(store):
+    build = CountingBuilder(error=ValueError("bad figure"))
+    with pytest.raises(ValueError):
+        _fetch_or_build(store, KEY, build)
+
+    assert build.builds == 1
+    assert store.get(KEY) is None
+    assert store.lock(KEY, figure_cache.FIGURE_LOCK_TIMEOUT) is not None
+
+
+def test_waiters_build_themselves_once_the_lock_times_out(store, monkeypatch):
+    monkeypatch.setattr(figure_cache, "FIGURE_LOCK_TIMEOUT", 0.2)
+    assert store.lock(KEY, 60) is not None  # Held by a builder that never finishes
+    build = CountingBuilder()
+    assert _fetch_or_build(store, KEY, build) == '{"data": []}'
+    assert build.builds == 1
+
+
+def test_store_errors_fall_back_to_building():
+    build = CountingBuilder()
+    assert _fetch_or_build(BrokenStore(), KEY, build) == '{"data": []}'
+    assert build.builds == 1
@@ -0,0 +1,207 @@
+"""
+Tests for the flag CDN circuit breaker
+
+The breaker runs on an injected clock, so backoffs expire without sleeping,
+and download_flag is driven through a stand-in session instead of the
+network.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import requests
+
+import flags
+
+
+class FakeClock:
+    """Settable stand-in for time.monotonic."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock, monkeypatch):
+    breaker = flags.CircuitBreaker(failure_threshold=3, base_backoff=5.0, max_backoff=20.0, clock=clock)
+    monkeypatch.setattr(flags, "FLAG_CDN_BREAKER", breaker)
+    return breaker
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+# ============================================================================
+# STATE MACHINE
+# ============================================================================
+
+def test_opens_after_threshold_consecutive_failures(breaker):
+    for _ in range(breaker.failure_threshold - 1):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.is_open()
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_refuses_until_the_backoff_expires(breaker, clock):
+    trip(breaker)
+    clock.now += breaker.backoff - 0.1
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert not breaker.is_open()
+
+
+def test_half_open_lets_a_single_trial_through(breaker, clock):
+    trip(breaker)
+    clock.now += breaker.backoff
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert breaker.is_open()
+    assert not breaker.allow()
+
+
+def test_failed_trial_reopens_with_doubled_backoff(breaker, clock):
+    trip(breaker)
+    for backoff in (10.0, 20.0, 20.0):
+        clock.now += breaker.backoff
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert breaker.backoff == backoff
+        assert breaker.open_until == clock.now + backoff
+
+
+def test_successful_trial_closes_and_resets_backoff(breaker, clock):
+    trip(breaker)
+    clock.now += breaker.backoff
+    assert breaker.allow()
+    breaker.record_failure()
+    clock.now += breaker.backoff
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.backoff == breaker.base_backoff
+    assert breaker.allow()
+
+
+def test_failures_reported_while_open_are_ignored(breaker, clock):
+    trip(breaker)
+    open_until = breaker.open_until
+    clock.now += 1.0
+    breaker.record_failure()  # A call that started before the breaker opened
+    assert breaker.open_until == open_until
+    assert breaker.backoff == breaker.base_backoff
+
+
+# ============================================================================
+# DOWNLOADS
+# ============================================================================
+
+class FakeSession:
+    """Session whose get() returns ``response`` or raises ``error``."""
+
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+def response(status: int, content: bytes = b"flag") -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = content
+    resp.url = "https://flags.test/xx.png"
+    return resp
+
+
+def half_open(breaker, clock):
+    trip(breaker)
+    clock.now += breaker.backoff
+
+
+@pytest.mark.parametrize("error", [
+    requests.ConnectionError("refused"),
+    ValueError("Invalid URL"),
+    KeyboardInterrupt(),
+])
+def test_any_failed_trial_settles_the_breaker(breaker, clock, monkeypatch, error):
+    half_open(breaker, clock)
+    monkeypatch.setattr(flags, "_http_session", lambda: FakeSession(error=error))
+
+    with pytest.raises(type(error)):
+        flags.download_flag("https://flags.test/xx.png")
+
+    assert breaker.state == "open"
+    assert not breaker._trial_in_flight
+    clock.now += breaker.backoff
+    assert breaker.allow()
+
+
+def test_session_errors_settle_the_breaker(breaker, clock, monkeypatch):
+    half_open(breaker, clock)
+
+    def broken_session():
+        raise RuntimeError("no session")
+
+    monkeypatch.setattr(flags, "_http_session", broken_session)
+    with pytest.raises(RuntimeError):
+        flags.download_flag("https://flags.test/xx.png")
+    assert breaker.state == "open"
+
+
+def test_server_errors_count_as_failures(breaker, monkeypatch):
+    monkeypatch.setattr(flags, "_http_session", lambda: FakeSession(response(503)))
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(requests.HTTPError):
+            flags.download_flag("https://flags.test/xx.png")
+    assert breaker.state == "open"
+
+
+def test_client_errors_show_the_cdn_is_up(breaker, clock, monkeypatch):
+    half_open(breaker, clock)
+    monkeypatch.setattr(flags, "_http_session", lambda: FakeSession(response(404)))
+    with pytest.raises(requests.HTTPError):
+        flags.download_flag("https://flags.test/xx.png")
+    assert breaker.state == "closed"
+
+
+def test_open_breaker_skips_the_network(breaker, monkeypatch):
+    session = FakeSession(response(200))
+    monkeypatch.setattr(flags, "_http_session", lambda: session)
+    trip(breaker)
+    with pytest.raises(flags.CircuitOpenError):
+        flags.download_flag("https://flags.test/xx.png")
+    assert session.calls == 0
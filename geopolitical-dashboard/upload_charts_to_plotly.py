@@ -44,7 +44,7 @@ def main():
     # Chart 0: Threat Perception (Home)
     print("📊 Chart 0: Central Asian Regional Threat Perception Analysis")
     try:
-        fig_home = create_threat_density_map()
+        fig_home = create_threat_density_map(inline_flags=True)
         upload_chart(fig_home, "threat-perception-analysis")
     except Exception as e:
         print(f"❌ Error creating chart: {e}")